@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Benchmark wgtray hot paths against fake wg, wg-quick, pkexec and sudo.
+
+Stub executables are put first on PATH, LIBDIR (WGTRAY_LIBDIR), the config
+directory (WG_TRAY_CONFIG_DIR) and HOME point at a temporary fixture, and
+each path is timed at every combination of config and interface counts.
+The report (JSON) lists p50/p95/p99 latency and process spawns per call.
+
+Usage:
+    scripts/benchmark.py [--configs 1,50,500] [--interfaces 1,10,100]
+                         [--peers 1] [--runs 30] [--no-tray] [-o FILE]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+
+LOG = 'echo "${0##*/}" >> "$WGTRAY_BENCH_LOG"'
+
+STUBS = {
+    "wg": LOG + r'''
+up="$WGTRAY_BENCH_STATE/up"
+dump_peers() {
+    for ((p = 0; p < WGTRAY_BENCH_PEERS; p++)); do
+        printf '%sKEY%05d\t(none)\t192.0.2.%d:51820\t10.0.%d.0/24\t%d\t%d\t%d\t25\n' \
+            "$1" "$p" $((p % 250)) $((p % 250)) $((1700000000 + p)) $((p * 1000)) $((p * 500))
+    done
+}
+case "$1 $2" in
+    "show interfaces")
+        for f in "$up"/*; do [[ -e "$f" ]] && printf '%s ' "${f##*/}"; done
+        echo
+        ;;
+    "show all")
+        for f in "$up"/*; do
+            [[ -e "$f" ]] || continue
+            printf '%s\tpriv\tpub\t51820\toff\n' "${f##*/}"
+            dump_peers "${f##*/}"$'\t'
+        done
+        ;;
+    show\ *)
+        [[ -e "$up/$2" ]] || exit 1
+        printf 'priv\tpub\t51820\toff\n'
+        dump_peers ""
+        ;;
+esac
+''',
+    "wg-quick": LOG + r'''
+case "$1" in
+    up) touch "$WGTRAY_BENCH_STATE/up/$2" ;;
+    down) rm -f "$WGTRAY_BENCH_STATE/up/$2" ;;
+esac
+''',
+    "pkexec": LOG + '\nexec "$@"\n',
+    "sudo": LOG + '\nexec "$@"\n',
+}
+
+
+def setup_env(root, peers):
+    """Create stubs and fixture directories and point wgtray at them."""
+    bindir = root / "bin"
+    libdir = root / "lib"
+    for d in (bindir, libdir, root / "conf", root / "state" / "up", root / "home"):
+        d.mkdir(parents=True)
+
+    for name, body in STUBS.items():
+        path = bindir / name
+        path.write_text("#!/bin/bash\n" + body)
+        path.chmod(0o755)
+    for script in (REPO / "src" / "lib").glob("*.sh"):
+        shutil.copy(script, libdir)
+        (libdir / script.name).chmod(0o755)
+
+    os.environ.update({
+        "PATH": f"{bindir}:{os.environ['PATH']}",
+        "HOME": str(root / "home"),
+        "WGTRAY_LIBDIR": str(libdir),
+        "WG_TRAY_CONFIG_DIR": str(root / "conf"),
+        "WGTRAY_HELPER_SOCKET": str(root / "helper.sock"),
+        "WGTRAY_BENCH_STATE": str(root / "state"),
+        "WGTRAY_BENCH_LOG": str(root / "spawns.log"),
+        "WGTRAY_BENCH_PEERS": str(peers),
+        "QT_QPA_PLATFORM": "offscreen",
+    })
+
+
+def set_fixture(root, n_configs, n_interfaces):
+    """Create n_configs configs and bring n_interfaces interfaces "up"."""
+    for d in (root / "conf", root / "state" / "up"):
+        for f in d.iterdir():
+            f.unlink()
+    for i in range(n_configs):
+        (root / "conf" / f"wg{i}.conf").write_text("[Interface]\n")
+    for i in range(n_interfaces):
+        (root / "state" / "up" / f"wg{i}").touch()
+
+
+class SpawnCounter:
+    """Count processes started by this process and by the stubs."""
+
+    def __init__(self, log):
+        self.log = Path(log)
+        self.direct = 0
+        original = subprocess.Popen.__init__
+        counter = self
+
+        def counting_init(self, *args, **kwargs):
+            counter.direct += 1
+            original(self, *args, **kwargs)
+
+        subprocess.Popen.__init__ = counting_init
+
+    def snapshot(self):
+        stubs = self.log.read_text().split() if self.log.exists() else []
+        return self.direct, stubs
+
+
+def measure(fn, runs, counter, setup=None):
+    """Time fn() `runs` times; setup() runs untimed before each call."""
+    from wgtray.history import percentile
+
+    times = []
+    direct0, stubs0 = counter.snapshot()
+    for _ in range(runs):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    direct1, stubs1 = counter.snapshot()
+
+    if setup:
+        # Subtract whatever setup() spawned by measuring it alone
+        d0, s0 = counter.snapshot()
+        for _ in range(runs):
+            setup()
+        d1, s1 = counter.snapshot()
+        direct1 -= d1 - d0
+        stubs1 = stubs1[:len(stubs1) - (len(s1) - len(s0))]
+
+    stub_counts = {}
+    for name in stubs1[len(stubs0):]:
+        stub_counts[name] = stub_counts.get(name, 0) + 1
+
+    times.sort()
+    return {
+        "runs": runs,
+        "p50_ms": round(percentile(times, 50), 3),
+        "p95_ms": round(percentile(times, 95), 3),
+        "p99_ms": round(percentile(times, 99), 3),
+        "mean_ms": round(sum(times) / runs, 3),
+        "spawns_per_call": round((direct1 - direct0) / runs, 2),
+        "stub_execs_per_call": {k: round(v / runs, 2) for k, v in sorted(stub_counts.items())},
+    }
+
+
+def bench_wireguard(root, n_configs, n_interfaces, runs, counter):
+    from wgtray import wireguard
+
+    spare = f"wg{max(n_configs, n_interfaces)}"
+    target = f"wg{max(n_configs, n_interfaces) + 1}"
+    active = [f"wg{i}" for i in range(n_interfaces)]
+    up = root / "state" / "up"
+
+    def disconnect_setup():
+        (up / spare).touch()
+
+    def switch_setup():
+        (up / spare).touch()
+        (up / target).unlink(missing_ok=True)
+
+    return {
+        "get_active_connections": measure(wireguard.get_active_connections, runs, counter),
+        "get_configs": measure(wireguard.get_configs, runs, counter),
+        "get_connection_stats": measure(lambda: wireguard.get_connection_stats(active[0]), runs, counter),
+        "get_all_stats": measure(lambda: wireguard.get_all_stats(active), runs, counter),
+        "connect": measure(
+            lambda: wireguard.connect(spare, require_password=False), runs, counter,
+            setup=lambda: (up / spare).unlink(missing_ok=True)
+        ),
+        "disconnect": measure(
+            lambda: wireguard.disconnect(spare, require_password=False), runs, counter,
+            setup=disconnect_setup
+        ),
+        "switch": measure(
+            lambda: wireguard.switch([spare], target, require_password=False), runs, counter,
+            setup=switch_setup
+        ),
+    }
+
+
+def bench_tray(runs, counter):
+    from wgtray.app import WgTray
+
+    tray = WgTray()
+
+    def settle():
+        while tray._refreshing or tray.worker.pool.activeThreadCount():
+            tray.app.processEvents()
+            time.sleep(0.0005)
+
+    def poll():
+        tray.poll_check()
+        settle()
+
+    settle()
+    results = {
+        "build_menu": measure(tray.build_menu, runs, counter),
+        "poll_check": measure(poll, runs, counter),
+    }
+    tray.quit()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--configs", default="1,50,500", help="config counts (default: 1,50,500)")
+    parser.add_argument("--interfaces", default="1,10,100", help="active interface counts (default: 1,10,100)")
+    parser.add_argument("--peers", type=int, default=1, help="peers per interface (default: 1)")
+    parser.add_argument("--runs", type=int, default=30, help="calls per measurement (default: 30)")
+    parser.add_argument("--no-tray", action="store_true", help="skip WgTray.build_menu/poll_check")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="wgtray-bench-"))
+    try:
+        setup_env(root, args.peers)
+        (root / "home" / ".config" / "wgtray").mkdir(parents=True)
+        (root / "home" / ".config" / "wgtray" / "config.toml").write_text(
+            '[advanced]\nmonitor_mode = "polling"\npoll_interval = 3600000\n'
+        )
+        sys.path.insert(0, str(REPO / "src"))
+
+        from wgtray import wireguard
+        # Fake interfaces are unknown to the kernel; measure the spawn path
+        wireguard._netlink_stats = False
+
+        counter = SpawnCounter(root / "spawns.log")
+        results = []
+        for n_configs in map(int, args.configs.split(",")):
+            for n_interfaces in map(int, args.interfaces.split(",")):
+                set_fixture(root, n_configs, n_interfaces)
+                entry = {
+                    "configs": n_configs,
+                    "interfaces": n_interfaces,
+                    "peers": args.peers,
+                    "results": bench_wireguard(root, n_configs, n_interfaces, args.runs, counter),
+                }
+                print(f"configs={n_configs} interfaces={n_interfaces} done", file=sys.stderr)
+                results.append(entry)
+
+        if not args.no_tray:
+            try:
+                import PySide6  # noqa: F401
+            except ImportError:
+                print("PySide6 not available, skipping tray benchmarks", file=sys.stderr)
+            else:
+                n_configs = max(map(int, args.configs.split(",")))
+                n_interfaces = max(map(int, args.interfaces.split(",")))
+                set_fixture(root, n_configs, n_interfaces)
+                results.append({
+                    "configs": n_configs,
+                    "interfaces": n_interfaces,
+                    "peers": args.peers,
+                    "results": bench_tray(args.runs, counter),
+                })
+
+        report = json.dumps({"benchmarks": results}, indent=2)
+        if args.output:
+            Path(args.output).write_text(report + "\n")
+        else:
+            print(report)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
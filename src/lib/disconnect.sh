@@ -3,6 +3,8 @@
 # Usage: disconnect.sh [config-name]
 
 CONFIG_NAME="$1"
+# Tunnels torn down at the same time when disconnecting all
+MAX_JOBS=8
 
 if [ -z "$CONFIG_NAME" ]; then
     ACTIVE=$(wg show interfaces 2>/dev/null)
@@ -11,8 +13,12 @@ if [ -z "$CONFIG_NAME" ]; then
         exit 0
     fi
     for iface in $ACTIVE; do
-        wg-quick down "$iface" 2>&1
+        while (( $(jobs -rp | wc -l) >= MAX_JOBS )); do
+            wait -n
+        done
+        wg-quick down "$iface" 2>&1 &
     done
+    wait
     echo "All connections closed"
 else
     if wg-quick down "$CONFIG_NAME" 2>&1; then
@@ -21,4 +27,4 @@ else
         echo "Failed to disconnect from $CONFIG_NAME" >&2
         exit 1
     fi
-fi
\ No newline at end of file
+fi
@@ -0,0 +1,65 @@
+#!/bin/bash
+# Switch WireGuard VPNs: bring down the old tunnels and bring up the new one
+# Usage: switch.sh <config-name> [active-interface...]
+#
+# Runs as root through pkexec, so a switch costs one privileged launch.
+# Hooks run in the usual order, each only if its sudoers rule names the
+# calling user. Every step prints "step<TAB>name<TAB>interface<TAB>ms<TAB>code"
+# on stdout; command output goes to stderr.
+
+CONSTANTS="/usr/share/wgtray/constants.conf"
+[[ -f "$CONSTANTS" ]] || CONSTANTS="$(dirname "$0")/../../res/constants.conf"
+source "$CONSTANTS"
+
+CONFIG_NAME="$1"
+shift
+
+if [ -z "$CONFIG_NAME" ]; then
+    echo "Error: No config name provided" >&2
+    exit 1
+fi
+
+CALLER=$(id -nu "${PKEXEC_UID:-0}" 2>/dev/null)
+
+now_us() {
+    echo "${EPOCHREALTIME/./}"
+}
+
+step() {
+    # step <name> <interface> <command...>
+    local name="$1" iface="$2" start code
+    shift 2
+    start=$(now_us)
+    "$@" >&2
+    code=$?
+    printf 'step\t%s\t%s\t%d\t%d\n' "$name" "$iface" $(( ($(now_us) - start) / 1000 )) "$code"
+    return $code
+}
+
+hook() {
+    # hook <interface> <event>: same rule as the sudoers entry from hooks.sh
+    local hook="$HOOKS_DIR/$1-$2"
+    local rule="$SUDOERS_DIR/wgtray-$1-$2"
+    [[ -f "$hook" ]] || return 0
+    if [[ "$CALLER" != "root" && "$(awk '{ print $1; exit }' "$rule" 2>/dev/null)" != "$CALLER" ]]; then
+        echo "$CALLER may not run $1-$2" >&2
+        return 1
+    fi
+    WGTRAY_INTERFACE="$1" WGTRAY_EVENT="$2" timeout 30 "$hook"
+}
+
+for iface in "$@"; do
+    [[ -f "$HOOKS_DIR/$iface-pre-disconnect" ]] && step pre-disconnect "$iface" hook "$iface" pre-disconnect
+    step down "$iface" wg-quick down "$iface"
+done
+
+[[ -f "$HOOKS_DIR/$CONFIG_NAME-pre-connect" ]] && step pre-connect "$CONFIG_NAME" hook "$CONFIG_NAME" pre-connect
+
+if ! step up "$CONFIG_NAME" wg-quick up "$CONFIG_NAME"; then
+    echo "Failed to connect to $CONFIG_NAME" >&2
+    exit 1
+fi
+
+[[ -f "$HOOKS_DIR/$CONFIG_NAME-post-connect" ]] && step post-connect "$CONFIG_NAME" hook "$CONFIG_NAME" post-connect
+
+exit 0
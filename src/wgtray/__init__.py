@@ -5,4 +5,10 @@ from .constants import VERSION
 __version__ = VERSION
 __all__ = ["WgTray"]
 
-from .app import WgTray
\ No newline at end of file
+
+def __getattr__(name):
+    # Imported lazily so Qt-free entry points (wgtray.helper) stay light
+    if name == "WgTray":
+        from .app import WgTray
+        return WgTray
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,9 +4,10 @@
 import sys
 import signal
 import fcntl
+import time
 from pathlib import Path
 
-from .app import WgTray
+STARTED = time.monotonic()
 
 LOCK_FILE = Path.home() / ".cache" / "wgtray.lock"
 
@@ -24,6 +25,10 @@ def acquire_lock():
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ("--state", "--stats", "--watch", "--connect", "--disconnect"):
+        from .control import main as control_main
+        sys.exit(control_main(sys.argv[1:]))
+
     debug = "--debug" in sys.argv or "-d" in sys.argv
     
     lock = acquire_lock()
@@ -32,8 +37,11 @@ def main():
         sys.exit(1)
     
     signal.signal(signal.SIGINT, signal.SIG_DFL)
-    
-    app = WgTray(debug=debug)
+
+    # Imported only once we know we are the running instance
+    from .app import WgTray
+
+    app = WgTray(debug=debug, started=STARTED)
     app.run()
 
 
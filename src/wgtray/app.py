@@ -3,18 +3,29 @@
 import sys
 import time
 from PySide6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QMessageBox, QDialog
-from PySide6.QtGui import QIcon, QAction
-from PySide6.QtCore import QTimer
-
-from .constants import VERSION, ICONDIR, ICONS
-from .config import load_config, save_config
+from PySide6.QtGui import QIcon
+from PySide6.QtCore import QObject, QEvent, QTimer, Signal
+
+from .constants import VERSION, ICONDIR, ICONS, METRICS_SOCKET
+from .config import load_config, save_config, flush_config, get_autostart_method, set_autostart
+from .configindex import ConfigIndex
+from .wgconfig import ConfigCache
+from .control import ControlServer
+from .history import HandshakeHistory
+from .menu import ConfigActions
+from .metrics import MetricsServer, Timeline, log_summary, timed
 from .monitor import NetlinkMonitor
-from .settings import SettingsDialog
-from .logger import setup_logging, logger
+from .peers import top_peers
+from .rates import RateSampler
+from .scheduler import RefreshScheduler
+from .watchdog import SleepMonitor, Watchdog
+from .logger import setup_logging, stop_logging, logger
+from .worker import Worker
 from .wireguard import (
-    get_active_connections, get_configs, connect, disconnect,
-    check_config_dir_permissions, open_config_folder,
-    get_connection_stats, format_bytes, format_handshake
+    get_active_connections, get_configs, disconnect,
+    check_config_dir_permissions, open_config_folder, set_active_source,
+    set_config_source, switch, handshake_since, connect_many, disconnect_many,
+    get_all_stats, format_bytes, format_handshake, format_rate
 )
 
 
@@ -52,101 +63,461 @@ def get_icon(name, theme="auto"):
     return QIcon()
 
 
+class IconCache(QObject):
+    """Icons pre-rendered once per (state, theme) at every tray size.
+
+    Entries are dropped when the application palette changes, which is
+    also when an "auto" theme may resolve differently.
+    """
+    SIZES = (16, 22, 24, 32, 48, 64)
+    invalidated = Signal()
+
+    def __init__(self, app):
+        super().__init__()
+        self._icons = {}
+        self._system_theme = None
+        self.hits = 0
+        self.misses = 0
+        app.installEventFilter(self)
+
+    def get(self, name, theme="auto"):
+        """Return the cached icon for name/theme, rendering it on first use."""
+        if theme == "auto":
+            if self._system_theme is None:
+                self._system_theme = detect_system_theme()
+            theme = self._system_theme
+
+        icon = self._icons.get((name, theme))
+        if icon is not None:
+            self.hits += 1
+            return icon
+
+        self.misses += 1
+        source = get_icon(name, theme)
+        icon = QIcon()
+        for size in self.SIZES:
+            icon.addPixmap(source.pixmap(size, size))
+        self._icons[(name, theme)] = icon
+        logger.debug(f"Icon cache: rendered {name}/{theme} ({self.hits} hits, {self.misses} misses)")
+        return icon
+
+    def invalidate(self):
+        """Drop all rendered icons."""
+        self._icons.clear()
+        self._system_theme = None
+        logger.debug(f"Icon cache invalidated ({self.hits} hits, {self.misses} misses)")
+        self.invalidated.emit()
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.ApplicationPaletteChange:
+            self.invalidate()
+        return False
+
+
+# Extra state refreshes while waiting for a handshake: 0.5 s, doubling up to 4 s
+HANDSHAKE_POLL = 0.5
+HANDSHAKE_POLL_CAP = 4
+
+
+def fetch_state(include_configs=True):
+    """Collect active interfaces, configs and stats (runs on the worker)."""
+    active = get_active_connections()
+    configs = get_configs() if include_configs else None
+    stats = get_all_stats(active) if active else {}
+    return active, configs, stats
+
+
+def _up_started(name, steps):
+    """Wall-clock time `wg-quick up` started, from switch() step timings."""
+    after_up = sum(s[2] for s in steps if s[1] == name and s[0] in ("up", "post-connect"))
+    return time.time() - after_up
+
+
+def connect_exclusive(name, require_password=True, exclusive=True):
+    """Switch from the active tunnels to `name` (runs on the worker).
+
+    With exclusive=False the other tunnels stay up.
+    """
+    others = [conn for conn in get_active_connections() if conn != name] if exclusive else []
+    success, hook_error, cancelled, steps = switch(others, name, require_password=require_password)
+    return success, hook_error, cancelled, _up_started(name, steps)
+
+
+def reconnect(name):
+    """Restart `name` (runs on the worker).
+
+    Returns:
+        Wall-clock time `wg-quick up` started, or None if it failed.
+    """
+    old = [name] if name in get_active_connections() else []
+    success, _, _, steps = switch(old, name, require_password=False)
+    return _up_started(name, steps) if success else None
+
+
+class _Commands(QObject):
+    """Carries control socket commands over to the GUI thread."""
+    requested = Signal(str, object)
+
+
 class WgTray:
-    def __init__(self, debug: bool = False):
+    def __init__(self, debug: bool = False, started: float | None = None):
         self._debug = debug
+        self.startup = Timeline(started)
         self.app = QApplication(sys.argv)
         self.app.setQuitOnLastWindowClosed(False)
         self.app.setApplicationName("wgtray")
         self.app.setDesktopFileName("wgtray")
+        self.startup.mark("qt")
 
         self._config = load_config()
 
-        setup_logging(debug=self._debug)
+        setup_logging(debug=self._debug, log_format=self._config.get("log_format", "text"))
         logger.info(f"wgtray {VERSION} starting")
 
-        check_config_dir_permissions()
-
         self._cache_active = []
         self._cache_configs = []
         self._cache_time = 0
         self._cache_ttl = 2
-        self._last_state = None
+        self._cache_stats = {}
+        self.rates = RateSampler(window=self._config.get("rate_window", 60))
+        self.history = HandshakeHistory()
+        self.config_info = ConfigCache()
+        # Created on first use: prober.py pulls in asyncio
+        self.prober = None
+        self._probing = False
+        self._probe_callbacks = []
+        self.watchdog = Watchdog(threshold=self._config.get("stale_threshold", 180))
+        self._sleep_active = []
+        self._icon_state = None
+
+        # In-flight operations (name -> "Connecting"/"Disconnecting")
+        self._busy = {}
+        self._refreshing = False
+        self._refresh_pending = None
+        self._refresh_callbacks = []
+        # Netlink events and poll ticks go through here, not straight to _refresh()
+        self.scheduler = RefreshScheduler(self._on_scheduled_refresh)
+        # Pending handshake waits: (name, since, deadline, done)
+        self._handshake_waits = []
+        self._handshake_delay = HANDSHAKE_POLL
+        self._handshake_timer = QTimer()
+        self._handshake_timer.setSingleShot(True)
+        self._handshake_timer.timeout.connect(self._poll_handshakes)
+
+        self.worker = Worker()
+
+        self.icons = IconCache(self.app)
+        self.icons.invalidated.connect(self._on_icons_invalidated)
 
         self.menu = QMenu()
+        self.menu.setToolTipsVisible(True)
         self.tray = QSystemTrayIcon()
         self.tray.setContextMenu(self.menu)
         self.menu.aboutToShow.connect(self.build_menu)
         self.tray.activated.connect(self.on_tray_click)
+        self._setup_menu()
+
+        # Set up by _start() once the icon is shown
+        self.config_index = None
+        self.netlink = None
+        self.poll_timer = None
+        self.metrics_server = None
+        self.sleep_monitor = None
+        self.control = None
+        self._monitor_mode = "unknown"
+
+        self._apply_icon()
+        self.tray.setVisible(True)
+        self.startup.mark("tray")
+
+        QTimer.singleShot(0, self._start)
+
+    def _start(self):
+        """Deferred initialization, run from the event loop after the icon is up."""
+        self.config_index = ConfigIndex(poll_interval=self._config.get("poll_interval", 3000))
+        self.config_index.changed.connect(self._on_configs_changed)
+        self.config_index.modified.connect(self._load_config_info)
+        set_config_source(self.config_index.configs)
+        self._cache_configs = self.config_index.configs()
+        self._load_config_info()
 
         self._setup_monitoring()
+        self.startup.mark("monitor")
+
+        self._update_metrics_server()
+        self._update_sleep_monitor()
+        self._start_control_server()
+        if self._debug:
+            self._metrics_timer = QTimer()
+            self._metrics_timer.timeout.connect(log_summary)
+            self._metrics_timer.start(60000)
 
-        self.update_icon()
         self.build_menu()
-        self.tray.setVisible(True)
+        self.worker.submit(check_config_dir_permissions, on_done=self._on_permissions_checked)
 
         if self._config.get("autoconnect", False):
             QTimer.singleShot(1000, self._auto_connect)
 
     def _setup_monitoring(self):
-        """Setup network monitoring based on config."""
+        """Setup network monitoring based on config.
+
+        In netlink mode the monitor's in-memory interface set answers
+        get_active_connections(), and the poll timer only runs while
+        tunnels are up to refresh their stats.
+        """
         mode = self._config.get("monitor_mode", "auto")
 
         self.netlink = None
         self.poll_timer = QTimer()
         self.poll_timer.timeout.connect(self.poll_check)
+        self.poll_timer.setInterval(self._config.get("poll_interval", 3000))
 
-        use_netlink = False
         if mode in ("auto", "netlink"):
             self.netlink = NetlinkMonitor()
-            if self.netlink.available:
-                use_netlink = True
-                self.netlink.changed.connect(self.on_network_change)
-                self.netlink.start()
+            self.netlink.changed.connect(self.on_network_change)
+            self.netlink.ready.connect(self.on_network_change)
+            self.netlink.failed.connect(self._on_netlink_failed)
+            set_active_source(self.netlink.interfaces)
+            self.netlink.start()
+
+        self._monitor_mode = "netlink" if self.netlink else "polling"
+        self._update_poll_timer()
+        logger.info(f"Monitor mode: {self._monitor_mode}")
 
-        if mode == "netlink" and not use_netlink:
+    def _on_netlink_failed(self, error):
+        """The monitor thread could not open a netlink socket: poll instead."""
+        if self._config.get("monitor_mode", "auto") == "netlink":
             logger.warning("Netlink requested but not available, falling back to polling")
+        set_active_source(None)
+        if self.netlink:
+            # run() has returned; this only closes the eventfd
+            self.netlink.stop()
+        self.netlink = None
+        self._monitor_mode = "polling"
+        self._update_poll_timer()
+        logger.info(f"Monitor mode: {self._monitor_mode}")
 
-        interval = self._config.get("poll_interval", 3000)
-        self.poll_timer.start(interval)
+    def _update_metrics_server(self):
+        """Start or stop the metrics endpoint to match the config."""
+        if self._config.get("metrics", False) and not self.metrics_server:
+            self.metrics_server = MetricsServer(METRICS_SOCKET)
+            try:
+                self.metrics_server.start()
+            except OSError as e:
+                logger.warning(f"Metrics endpoint unavailable: {e}")
+                self.metrics_server = None
+        elif not self._config.get("metrics", False) and self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+    def _start_control_server(self):
+        """Serve state and accept commands for `wgtray --state` and friends."""
+        self._commands = _Commands()
+        self._commands.requested.connect(self._on_command)
+        self.control = ControlServer(self._commands.requested.emit)
+        try:
+            self.control.start()
+        except OSError as e:
+            logger.warning(f"Control socket unavailable: {e}")
+            self.control = None
+        self._publish()
+
+    def _on_command(self, op, name):
+        logger.info(f"Control: {op} {name or ''}".rstrip())
+        if op == "connect":
+            self.on_connect(name)
+        elif name:
+            self.on_disconnect(name)
+        else:
+            self.on_disconnect_all()
 
-        self._monitor_mode = "netlink" if use_netlink else "polling"
-        logger.info(f"Monitor mode: {self._monitor_mode}")
+    def _publish(self):
+        """Hand the current state to the control socket."""
+        if not self.control:
+            return
+        stats = {}
+        for iface in self._cache_active:
+            s = self._cache_stats.get(iface)
+            if not s:
+                continue
+            stats[iface] = {
+                "rx_bytes": s["rx_bytes"],
+                "tx_bytes": s["tx_bytes"],
+                "latest_handshake": s["latest_handshake"],
+                "peers": len(s["peers"]),
+                **(self.rates.rates(iface) or {}),
+            }
+        self.control.publish({
+            "connected": bool(self._cache_active),
+            "active": list(self._cache_active),
+            "busy": dict(self._busy),
+            "configs": list(self._cache_configs),
+        }, stats)
+
+    def _update_sleep_monitor(self):
+        """Listen for suspend/resume once auto-reconnect is enabled."""
+        if self._config.get("auto_reconnect", True) and not self.sleep_monitor:
+            self.sleep_monitor = SleepMonitor()
+            self.sleep_monitor.sleeping.connect(self._on_sleeping)
+            self.sleep_monitor.resumed.connect(self._on_resumed)
+            if not self.sleep_monitor.start():
+                self.sleep_monitor = None
+
+    def _update_poll_timer(self):
+        """Poll always in polling mode; in netlink mode only for stats."""
+        if self.poll_timer is None:
+            return
+        needed = self._monitor_mode == "polling" or bool(self._cache_active)
+        if needed and not self.poll_timer.isActive():
+            self.poll_timer.start()
+        elif not needed and self.poll_timer.isActive():
+            self.poll_timer.stop()
+
+    def _on_permissions_checked(self, _):
+        self.config_index.rescan()
+        self.update_icon()
+
+    def _on_configs_changed(self):
+        self._cache_configs = self.config_index.configs()
+        self.config_info.forget(self._cache_configs)
+        self._load_config_info()
+        self._publish()
+        if self.menu.isVisible():
+            self.build_menu()
+
+    def _load_config_info(self):
+        """Re-read changed configs on the worker; the menu only reads the cache."""
+        self.worker.submit(self.config_info.load, list(self._cache_configs),
+                           on_done=self._on_config_info_loaded)
+
+    def _on_config_info_loaded(self, _):
+        if self.menu.isVisible():
+            self.build_menu()
 
     def _auto_connect(self):
-        """Auto-connect to default or last VPN."""
-        active = get_active_connections()
-        if active:
-            return
+        """Auto-connect to default or last VPN (or the fastest one)."""
+        if self._config.get("connect_policy", "default") == "fastest":
+            self._probe(then=lambda: self._refresh(then=self._auto_connect_now))
+        else:
+            self._refresh(then=self._auto_connect_now)
 
-        configs = get_configs()
-        if not configs:
+    def _auto_connect_now(self):
+        if self._cache_active or self._busy:
             return
+        name = self._pick_config()
+        if name:
+            self.on_connect(name)
+
+    def _pick_config(self):
+        """Pick default, then last used, then first config from the cache.
 
+        With the "fastest" policy, the config whose endpoint answered
+        quickest wins if any was probed.
+        """
+        configs = self._cache_configs
+        if not configs:
+            return None
+        if self._config.get("connect_policy", "default") == "fastest":
+            endpoints = self._endpoints()
+            rtts = self._prober().fresh(endpoints.values())
+            reachable = [(rtts[e], name) for name, e in endpoints.items() if rtts.get(e) is not None]
+            if reachable:
+                rtt, name = min(reachable)
+                logger.info(f"Fastest endpoint: {name} ({rtt * 1000:.0f} ms)")
+                return name
         default = self._config.get("default_connection") or self._config.get("last_connection")
         if default and default in configs:
-            self.on_connect(default)
-        elif configs:
-            self.on_connect(configs[0])
+            return default
+        return configs[0]
 
     def poll_check(self):
-        active = get_active_connections()
-        state = tuple(sorted(active))
-        if state != self._last_state:
-            self._last_state = state
-            self.update_icon()
-        elif active:
-            self._update_tooltip(active)
+        self.scheduler.request("poll", immediate=True)
+
+    def on_network_change(self, event=None):
+        """A WireGuard link changed (LinkEvent), or the monitor is ready (None)."""
+        self.scheduler.request("netlink")
+
+    def _on_scheduled_refresh(self, configs):
+        # The refresh also serves the next poll tick: restart its interval
+        if self.poll_timer and self.poll_timer.isActive():
+            self.poll_timer.start()
+        self._refresh(configs)
+
+    def _refresh(self, configs=True, then=None):
+        """Fetch connection state on the worker and apply it when done.
+
+        Only one fetch runs at a time; requests made meanwhile are folded
+        into a single follow-up fetch.
+        """
+        if then:
+            self._refresh_callbacks.append(then)
+        if self._refreshing:
+            self._refresh_pending = bool(self._refresh_pending) or configs
+            return
+        self._refreshing = True
+        self.worker.submit(
+            fetch_state, configs,
+            on_done=self._apply_state,
+            on_error=lambda _: self._apply_state(None)
+        )
 
-    def on_network_change(self):
-        QTimer.singleShot(300, self.update_icon)
+    def _apply_state(self, state):
+        """Apply a fetch_state() result on the main thread."""
+        self._refreshing = False
+        if state is not None:
+            active, configs, stats = state
+            self._cache_active = active
+            self._cache_stats = stats
+            self.rates.add_stats(stats)
+            self._check_handshakes()
+            if self._config.get("auto_reconnect", True):
+                for iface in self.watchdog.observe(stats):
+                    self._reconnect(iface)
+            if configs is not None:
+                self._cache_configs = configs
+                self._cache_time = time.time()
+            self._apply_icon()
+            self._publish()
+            if self.startup:
+                self.startup.mark("first state")
+                self.startup.finish("wgtray_startup_duration_seconds")
+                self.startup = None
+            self._update_poll_timer()
+            if self.menu.isVisible():
+                self.build_menu()
+
+        if self._refresh_pending is not None:
+            configs = self._refresh_pending
+            self._refresh_pending = None
+            self._refresh(configs)
+            return
 
-    def _refresh_cache(self, force=False):
-        now = time.time()
-        if force or (now - self._cache_time > self._cache_ttl):
-            self._cache_active = get_active_connections()
-            self._cache_configs = get_configs()
-            self._cache_time = now
+        callbacks, self._refresh_callbacks = self._refresh_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def _format_stats(self, iface):
+        """Format cached stats for an interface as a single line."""
+        stats = self._cache_stats.get(iface)
+        if not stats:
+            return iface
+        rx = format_bytes(stats["rx_bytes"])
+        tx = format_bytes(stats["tx_bytes"])
+        hs = format_handshake(stats["latest_handshake"])
+        line = f"{iface}: ↓{rx} ↑{tx} ({hs})"
+        rates = self.rates.rates(iface)
+        if rates:
+            line += f" · ↓{format_rate(rates['rx_rate'])} ↑{format_rate(rates['tx_rate'])}"
+        return line
+
+    def _format_rates(self, iface):
+        """Format average and peak rates over the configured window."""
+        rates = self.rates.rates(iface)
+        if not rates:
+            return None
+        return (f"avg ↓{format_rate(rates['rx_avg'])} ↑{format_rate(rates['tx_avg'])}, "
+                f"peak ↓{format_rate(rates['rx_peak'])} ↑{format_rate(rates['tx_peak'])} "
+                f"({self.rates.window}s)")
 
     def show_notification(self, title, message, error=False):
         if not self._config.get("notifications", True):
@@ -154,112 +525,218 @@ class WgTray:
         icon = QSystemTrayIcon.MessageIcon.Critical if error else QSystemTrayIcon.MessageIcon.Information
         self.tray.showMessage(title, message, icon, 3000)
 
-    def _update_tooltip(self, active):
-        """Update tooltip with connection stats."""
+    def _update_tooltip(self):
+        """Update tooltip with connection stats and in-flight operations."""
+        tooltip_lines = [f"{label} {name}…" for name, label in self._busy.items()]
+        active = self._cache_active
         if active:
-            tooltip_lines = ["WireGuard: Connected"]
+            tooltip_lines.insert(0, "WireGuard: Connected")
             for iface in active:
-                stats = get_connection_stats(iface)
-                if stats:
-                    rx = format_bytes(stats["rx_bytes"])
-                    tx = format_bytes(stats["tx_bytes"])
-                    hs = format_handshake(stats["latest_handshake"])
-                    tooltip_lines.append(f"{iface}: ↓{rx} ↑{tx} ({hs})")
-                else:
-                    tooltip_lines.append(iface)
-            self.tray.setToolTip("\n".join(tooltip_lines))
+                tooltip_lines.append(self._format_stats(iface))
+                rates = self._format_rates(iface)
+                if rates:
+                    tooltip_lines.append(f"   {rates}")
         else:
-            self.tray.setToolTip("WireGuard: Not connected")
-
-    def update_icon(self):
-        self._refresh_cache(force=True)
-        active = self._cache_active
-        self._last_state = tuple(sorted(active))
+            tooltip_lines.insert(0, "WireGuard: Not connected")
+        self.tray.setToolTip("\n".join(tooltip_lines))
 
+    def _apply_icon(self):
+        """Update icon and tooltip from the cached state."""
         theme = self._config.get("icon_theme", "auto")
+        state = ("connected" if self._cache_active else "disconnected", theme)
 
-        if active:
-            self.tray.setIcon(get_icon("connected", theme))
-        else:
-            self.tray.setIcon(get_icon("disconnected", theme))
+        if state != self._icon_state:
+            self._icon_state = state
+            self.tray.setIcon(self.icons.get(state[0], theme))
+            self.app.setWindowIcon(self.icons.get("disconnected", theme))
+        self._update_tooltip()
 
-        self.app.setWindowIcon(get_icon("disconnected", theme))
-        self._update_tooltip(active)
+    def _on_icons_invalidated(self):
+        self._icon_state = None
+        self._apply_icon()
+
+    def update_icon(self):
+        """Refresh state in the background, then update icon and tooltip."""
+        self._refresh()
+
+    def _set_busy(self, name, label=None):
+        """Mark an operation on `name` as in flight (or finished if label is None)."""
+        if label:
+            self._busy[name] = label
+        else:
+            self._busy.pop(name, None)
+        self._update_tooltip()
+        self._publish()
+        if self.menu.isVisible():
+            self.build_menu()
 
     def build_menu(self):
-        self.menu.clear()
-        self._refresh_cache()
+        with timed("wgtray_menu_build_duration_seconds"):
+            self._build_menu()
+
+    def _setup_menu(self):
+        """Create the fixed menu items; build_menu() only updates them."""
+        self._status_action = self.menu.addAction("Status: Not connected")
+        self._status_action.setEnabled(False)
+        # Interface submenus go before, config entries after this separator
+        self._configs_separator = self.menu.addSeparator()
+        self._peer_menus = {}
+
+        self._no_configs = self.menu.addAction("No configurations found")
+        self._no_configs.setEnabled(False)
+        self.config_actions = ConfigActions(self.menu, self._no_configs, self._on_config_triggered)
+
+        self._group_action = self.menu.addAction("Connect group")
+        self._group_action.triggered.connect(self.on_connect_group)
+        self._disconnect_all_action = self.menu.addAction("Disconnect all")
+        self._disconnect_all_action.triggered.connect(self.on_disconnect_all)
+
+        self.menu.addSeparator()
+        self.menu.addAction("Open config folder").triggered.connect(
+            lambda: self.worker.submit(open_config_folder)
+        )
+        self.menu.addSeparator()
+        self.menu.addAction("Settings").triggered.connect(self.on_settings)
+        self.menu.addSeparator()
+        self.menu.addAction("Quit").triggered.connect(self.quit)
+
+    def _build_menu(self):
+        if time.time() - self._cache_time > self._cache_ttl:
+            self._refresh()
+        if (self._config.get("show_latency", False) and not self._probing
+                and self._prober().stale(self._endpoints().values())):
+            self._probe()
 
         active = self._cache_active
         configs = self._cache_configs
 
         status_text = f"Connected ({', '.join(active)})" if active else "Not connected"
-        status = QAction(f"Status: {status_text}", self.menu)
-        status.setEnabled(False)
-        self.menu.addAction(status)
-        self.menu.addSeparator()
-
-        if configs:
-            for name in configs:
-                if name in active:
-                    action = QAction(f"✓ {name}", self.menu)
-                    action.triggered.connect(lambda c, n=name: self.on_disconnect(n))
-                else:
-                    action = QAction(f"   {name}", self.menu)
-                    action.triggered.connect(lambda c, n=name: self.on_connect(n))
-                self.menu.addAction(action)
-        else:
-            no_conf = QAction("No configurations found", self.menu)
-            no_conf.setEnabled(False)
-            self.menu.addAction(no_conf)
+        self._set_text(self._status_action, f"Status: {status_text}")
 
-        self.menu.addSeparator()
+        self._update_peer_menus(active)
 
-        folder = QAction("Open config folder", self.menu)
-        folder.triggered.connect(open_config_folder)
-        self.menu.addAction(folder)
+        self.config_actions.update([self._config_entry(name) for name in configs])
+        self._no_configs.setVisible(not configs)
 
-        self.menu.addSeparator()
+        multi = self._config.get("multi_tunnel", False)
+        group = self._group() if multi else []
+        self._group_action.setVisible(bool(group))
+        if group:
+            self._set_text(self._group_action, f"Connect group ({', '.join(group)})")
+            self._group_action.setEnabled(any(n not in active for n in group))
+        self._disconnect_all_action.setVisible(multi and len(active) > 1)
 
-        settings = QAction("Settings", self.menu)
-        settings.triggered.connect(self.on_settings)
-        self.menu.addAction(settings)
+    @staticmethod
+    def _set_text(action, text):
+        if action.text() != text:
+            action.setText(text)
 
-        self.menu.addSeparator()
+    def _on_config_triggered(self, name):
+        if name in self._busy:
+            return
+        if name in self._cache_active:
+            self.on_disconnect(name)
+        else:
+            self.on_connect(name)
 
-        quit_action = QAction("Quit", self.menu)
-        quit_action.triggered.connect(self.quit)
-        self.menu.addAction(quit_action)
+    def _update_peer_menus(self, active):
+        """Keep one submenu per active interface; peers are listed when it opens."""
+        if list(self._peer_menus) != list(active):
+            menus = {}
+            for iface in active:
+                submenu = self._peer_menus.pop(iface, None)
+                if submenu is None:
+                    submenu = QMenu(self.menu)
+                    submenu.setToolTipsVisible(True)
+                    submenu.aboutToShow.connect(lambda i=iface: self._fill_peer_menu(i))
+                else:
+                    self.menu.removeAction(submenu.menuAction())
+                menus[iface] = submenu
+            for submenu in self._peer_menus.values():
+                self.menu.removeAction(submenu.menuAction())
+                submenu.deleteLater()
+            for submenu in menus.values():
+                self.menu.insertMenu(self._configs_separator, submenu)
+            self._peer_menus = menus
+
+        for iface, submenu in self._peer_menus.items():
+            title = f"   {self._format_stats(iface)}"
+            if submenu.title() != title:
+                submenu.setTitle(title)
+            if submenu.isVisible():
+                self._fill_peer_menu(iface)
+
+    def _fill_peer_menu(self, iface):
+        """List the top peers of an interface in its submenu."""
+        submenu = self._peer_menus.get(iface)
+        if submenu is None:
+            return
+        submenu.clear()
+
+        peers = self._cache_stats.get(iface, {}).get("peers", [])
+        limit = self._config.get("peer_limit", 10)
+        for peer in top_peers(peers, limit, self._config.get("peer_sort", "traffic")):
+            rx = format_bytes(peer.rx_bytes)
+            tx = format_bytes(peer.tx_bytes)
+            hs = format_handshake(peer.latest_handshake or None)
+            action = submenu.addAction(
+                f"{peer.public_key[:8]}…  {peer.endpoint or '(no endpoint)'}  ↓{rx} ↑{tx} ({hs})"
+            )
+            action.setToolTip(f"{peer.public_key}\nAllowed IPs: {peer.allowed_ips or '(none)'}")
+            action.setEnabled(False)
+
+        if len(peers) > limit:
+            submenu.addAction(f"… {len(peers) - limit} more peers").setEnabled(False)
+        elif not peers:
+            submenu.addAction("No peers").setEnabled(False)
 
     def on_tray_click(self, reason):
         if reason == QSystemTrayIcon.ActivationReason.Trigger:
-            active = get_active_connections()
-            if active:
-                self.on_disconnect(active[0])
-            else:
-                configs = get_configs()
-                if not configs:
-                    return
-                default = self._config.get("default_connection") or self._config.get("last_connection")
-                if default and default in configs:
-                    self.on_connect(default)
-                elif configs:
-                    self.on_connect(configs[0])
+            self._refresh(configs=not self._cache_configs, then=self._toggle)
+
+    def _toggle(self):
+        """Disconnect the active tunnel or connect the preferred one."""
+        if self._busy:
+            return
+        if self._config.get("multi_tunnel", False):
+            if self._cache_active:
+                self.on_disconnect_all()
+                return
+            if self._group():
+                self.on_connect_group()
+                return
+        if self._cache_active:
+            self.on_disconnect(self._cache_active[0])
+        else:
+            name = self._pick_config()
+            if name:
+                self.on_connect(name)
 
     def on_connect(self, name):
-        active = get_active_connections()
-        if name in active:
+        if name in self._busy:
+            return
+        if name in self._cache_active:
             self.show_notification("WireGuard", f"Already connected to {name}")
             return
-
-        for conn in active:
-            disconnect(conn, require_password=False)
+        if not self._preflight(name):
+            return
 
         logger.info(f"Connecting to {name}")
         require_pw = self._config.get("require_password", True)
-        success, hook_error, cancelled = connect(name, require_password=require_pw)
+        self._set_busy(name, "Connecting")
+        self.worker.submit(
+            connect_exclusive, name, require_password=require_pw,
+            exclusive=not self._config.get("multi_tunnel", False),
+            on_done=lambda result: self._on_connect_done(name, result),
+            on_error=lambda _: self._on_connect_done(name, (False, None, False, None))
+        )
+
+    def _on_connect_done(self, name, result):
+        success, hook_error, cancelled, up_started = result
+        self._set_busy(name)
 
         if cancelled:
+            self.update_icon()
             return
 
         if success:
@@ -270,17 +747,261 @@ class WgTray:
             self.show_notification("WireGuard", msg, error=bool(hook_error))
             self._config["last_connection"] = name
             save_config(self._config)
+            timeout = self._config.get("handshake_timeout", 10)
+            self._wait_handshake(
+                name, up_started, timeout, lambda seconds: self._on_handshake(name, seconds, timeout)
+            )
         else:
             logger.error(f"Failed to connect to {name}")
             self.show_notification("WireGuard", f"Failed to connect to {name}", error=True)
         self.update_icon()
 
+    def _wait_handshake(self, name, since, timeout, done):
+        """Call done(seconds or None) once `name` has a handshake after `since`.
+
+        Rides on the shared state refresh, asking for extra refreshes after
+        0.5, 1, 2, 4, 4, ... s, instead of polling wg per tunnel on a
+        worker thread.
+        """
+        self._handshake_waits.append((name, since, time.monotonic() + timeout, done))
+        self._handshake_delay = HANDSHAKE_POLL
+        self._handshake_timer.start(int(self._handshake_delay * 1000))
+
+    def _poll_handshakes(self):
+        self._check_handshakes()
+        if not self._handshake_waits:
+            return
+        self.scheduler.request("handshake", immediate=True)
+        self._handshake_delay = min(self._handshake_delay * 2, HANDSHAKE_POLL_CAP)
+        # Wake up for the nearest deadline even while backing off
+        until_deadline = min(w[2] for w in self._handshake_waits) - time.monotonic()
+        delay = max(0.05, min(self._handshake_delay, until_deadline))
+        self._handshake_timer.start(int(delay * 1000))
+
+    def _check_handshakes(self):
+        """Finish the waits the cached stats answer or that timed out."""
+        now = time.monotonic()
+        waits, self._handshake_waits = self._handshake_waits, []
+        for name, since, deadline, done in waits:
+            seconds = handshake_since(self._cache_stats.get(name), since)
+            if seconds is None and now < deadline:
+                self._handshake_waits.append((name, since, deadline, done))
+            else:
+                done(seconds)
+
+    def _on_handshake(self, name, seconds, timeout):
+        """Record the time to first handshake of a connect to `name`."""
+        if seconds is None:
+            logger.warning(f"No handshake from {name} within {timeout}s")
+            if name in self._cache_active:
+                self.show_notification(
+                    "WireGuard", f"{name}: no handshake within {timeout}s", error=True
+                )
+        else:
+            logger.info(f"First handshake on {name} after {seconds:.2f}s")
+        self.worker.submit(self.history.record, name, seconds)
+
+    def _config_entry(self, name):
+        """Menu entry of a config: (name, text, tooltip, enabled).
+
+        The text carries the state, validation result, endpoint latency
+        and handshake latency; the tooltip the config details.
+        """
+        if name in self._busy:
+            return name, f"… {name} ({self._busy[name]}…)", "", False
+        text = f"✓ {name}" if name in self._cache_active else f"   {name}"
+        tooltip = []
+
+        info = self.config_info.cached(name)
+        if info:
+            if info.errors:
+                text += "  ⚠ invalid"
+            tooltip.append(info.summary())
+            endpoint = info.peers[0].endpoint if info.peers else None
+            if endpoint and self._config.get("show_latency", False):
+                rtts = self._prober().fresh([endpoint])
+                if endpoint in rtts:
+                    rtt = rtts[endpoint]
+                    text += "  · timeout" if rtt is None else f"  · {rtt * 1000:.0f} ms"
+
+        summary = self.history.summary(name)
+        if summary and summary["p50"] is None:
+            text += "  ⚠ no handshake"
+            tooltip.append(f"No handshake in the last {summary['count']} connects")
+        elif summary:
+            flag = " ⚠" if summary["last_timeout"] else ""
+            text += f"  ⏱ {summary['p50']:.1f}s / {summary['p95']:.1f}s{flag}"
+            tooltip.append(f"Time to first handshake over the last {summary['count']} connects: "
+                           f"p50 {summary['p50']:.2f}s, p95 {summary['p95']:.2f}s")
+            if summary["timeouts"]:
+                tooltip.append(f"{summary['timeouts']} without handshake")
+
+        return name, text, "\n".join(line for line in tooltip if line), True
+
+    def _prober(self):
+        if self.prober is None:
+            from .prober import EndpointProber
+            self.prober = EndpointProber()
+        return self.prober
+
+    def _endpoints(self):
+        """Map config name to the endpoint of its first peer, where known."""
+        endpoints = {}
+        for name in self._cache_configs:
+            info = self.config_info.cached(name)
+            if info and info.peers and info.peers[0].endpoint:
+                endpoints[name] = info.peers[0].endpoint
+        return endpoints
+
+    def _probe(self, then=None):
+        """Probe endpoints without a fresh RTT on the worker, then call `then`."""
+        if self._probing:
+            if then:
+                self._probe_callbacks.append(then)
+            return
+        stale = self._prober().stale(self._endpoints().values())
+        if not stale:
+            if then:
+                then()
+            return
+        if then:
+            self._probe_callbacks.append(then)
+        self._probing = True
+        self.worker.submit(self._prober().refresh, stale,
+                           on_done=self._on_probed, on_error=self._on_probed)
+
+    def _on_probed(self, _):
+        """A worker probe finished: show the new RTTs and run the callbacks."""
+        self._probing = False
+        if self.menu.isVisible():
+            self.build_menu()
+        callbacks, self._probe_callbacks = self._probe_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def _preflight(self, name):
+        """Check a config before spending a privileged call on it."""
+        info = self.config_info.get(name)
+        if info is None or not info.errors:
+            return True
+        logger.error(f"Invalid config {name}: {'; '.join(info.errors)}")
+        self.show_notification("WireGuard", f"Invalid config {name}: {info.errors[0]}", error=True)
+        return False
+
+    def _on_sleeping(self):
+        self._sleep_active = list(self._cache_active)
+
+    def _on_resumed(self):
+        self._refresh(then=self._after_resume)
+
+    def _after_resume(self):
+        before, self._sleep_active = self._sleep_active, []
+        if self._config.get("auto_reconnect", True):
+            for iface in self.watchdog.resumed(before, self._cache_active):
+                self._reconnect(iface)
+
+    def _reconnect(self, name):
+        """Let the watchdog restart `name`, unless the user is acting on it."""
+        if name in self._busy or not self.watchdog.watching(name):
+            return
+        logger.info(f"Watchdog: reconnecting {name}")
+        self.watchdog.started(name)
+        self._set_busy(name, "Reconnecting")
+        self.worker.submit(
+            reconnect, name,
+            on_done=lambda started: self._on_reconnected(name, started),
+            on_error=lambda _: self._on_reconnect_done(name, False)
+        )
+
+    def _on_reconnected(self, name, started):
+        """The tunnel is back up (or not); wait for its handshake."""
+        if started is None:
+            self._on_reconnect_done(name, False)
+            return
+        self._wait_handshake(name, started, self._config.get("handshake_timeout", 10),
+                             lambda seconds: self._on_reconnect_done(name, seconds is not None))
+
+    def _on_reconnect_done(self, name, ok):
+        self._set_busy(name)
+        delay = self.watchdog.finished(name, ok)
+        if delay is not None:
+            QTimer.singleShot(int(delay * 1000), lambda: self._reconnect(name))
+        elif not ok:
+            self.show_notification("WireGuard", f"Could not reconnect {name}", error=True)
+        self.update_icon()
+
+    def _group(self):
+        """Configs of the tunnel group that exist."""
+        return [n for n in self._config.get("tunnel_group", []) if n in self._cache_configs]
+
+    def on_connect_group(self):
+        names = [n for n in self._group()
+                 if n not in self._cache_active and n not in self._busy and self._preflight(n)]
+        if not names:
+            return
+        logger.info(f"Connecting to {', '.join(names)}")
+        self._run_many(connect_many, names, "Connecting", "Connected")
+
+    def on_disconnect_all(self):
+        names = [n for n in self._cache_active if n not in self._busy]
+        if not names:
+            return
+        for name in names:
+            self.watchdog.forget(name)
+        logger.info(f"Disconnecting from {', '.join(names)}")
+        self._run_many(disconnect_many, names, "Disconnecting", "Disconnected")
+
+    def _run_many(self, fn, names, busy_label, done_label):
+        """Bring several tunnels up or down in parallel on the worker."""
+        for name in names:
+            self._set_busy(name, busy_label)
+        self.worker.submit(
+            fn, names,
+            require_password=self._config.get("require_password", True),
+            max_workers=self._config.get("tunnel_concurrency", 4),
+            on_done=lambda result: self._on_many_done(names, done_label, result),
+            on_error=lambda _: self._on_many_done(names, done_label, ([], False))
+        )
+
+    def _on_many_done(self, names, done_label, result):
+        results, cancelled = result
+        for name in names:
+            self._set_busy(name)
+        if cancelled:
+            self.update_icon()
+            return
+
+        ok = [name for name, success, _, _ in results if success]
+        lines = [f"{done_label} {len(ok)}/{len(names)}: {', '.join(ok) or 'none'}"]
+        for name, success, hook_error, _ in results:
+            if not success:
+                lines.append(f"✗ {name} failed")
+            elif hook_error:
+                lines.append(f"⚠ {name}: hook failed: {hook_error}")
+        failed = len(ok) < len(names) or any(r[2] for r in results)
+        self.show_notification("WireGuard", "\n".join(lines), error=failed)
+        self.update_icon()
+
     def on_disconnect(self, name):
+        if name in self._busy:
+            return
+        self.watchdog.forget(name)
+
         logger.info(f"Disconnecting from {name}")
         require_pw = self._config.get("require_password", True)
-        success, hook_error, cancelled = disconnect(name, require_password=require_pw)
+        self._set_busy(name, "Disconnecting")
+        self.worker.submit(
+            disconnect, name, require_password=require_pw,
+            on_done=lambda result: self._on_disconnect_done(name, result),
+            on_error=lambda _: self._on_disconnect_done(name, (False, None, False))
+        )
+
+    def _on_disconnect_done(self, name, result):
+        success, hook_error, cancelled = result
+        self._set_busy(name)
 
         if cancelled:
+            self.update_icon()
             return
 
         if success:
@@ -295,21 +1016,41 @@ class WgTray:
         self.update_icon()
 
     def on_refresh(self):
-        self._refresh_cache(force=True)
         self.update_icon()
 
     def on_settings(self):
-        dialog = SettingsDialog(self._config, self._cache_configs, self._monitor_mode)
+        # autostart.sh queries systemctl, so look it up before opening the dialog
+        self.worker.submit(get_autostart_method, on_done=self._show_settings)
+
+    def _show_settings(self, autostart_method):
+        from .settings import SettingsDialog
+
+        dialog = SettingsDialog(self._config, self._cache_configs, self._monitor_mode, autostart_method)
         dialog.refresh_clicked.connect(self.on_refresh)
         dialog.about_clicked.connect(self.on_about)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             old_mode = self._config.get("monitor_mode")
             old_interval = self._config.get("poll_interval")
+            old_theme = self._config.get("icon_theme")
+            old_log_format = self._config.get("log_format", "text")
 
             self._config = dialog.get_config()
             save_config(self._config)
+            if self._config.get("log_format", "text") != old_log_format:
+                setup_logging(debug=self._debug, log_format=self._config["log_format"])
             logger.info("Settings saved")
 
+            self.rates.window = self._config.get("rate_window", 60)
+            self.watchdog.threshold = self._config.get("stale_threshold", 180)
+            self._update_metrics_server()
+            self._update_sleep_monitor()
+
+            if self._config.get("icon_theme") != old_theme:
+                self.icons.invalidate()
+
+            if dialog.autostart_method() != autostart_method:
+                self.worker.submit(set_autostart, dialog.autostart_method())
+
             if (self._config.get("monitor_mode") != old_mode or
                 self._config.get("poll_interval") != old_interval):
                 self._restart_monitoring()
@@ -319,8 +1060,10 @@ class WgTray:
     def _restart_monitoring(self):
         """Restart monitoring with new settings."""
         if self.netlink:
+            set_active_source(None)
             self.netlink.stop()
-        self.poll_timer.stop()
+        if self.poll_timer:
+            self.poll_timer.stop()
         self._setup_monitoring()
 
     def on_about(self):
@@ -336,9 +1079,21 @@ class WgTray:
 
     def quit(self):
         logger.info("wgtray shutting down")
+        requests, refreshes = self.scheduler.counters()
+        logger.info(f"Refresh: {requests} requests, {refreshes} refreshes")
+        self.scheduler.cancel()
+        log_summary()
+        flush_config()
+        stop_logging()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        if self.control:
+            self.control.stop()
         if self.netlink:
             self.netlink.stop()
-        self.poll_timer.stop()
+        if self.poll_timer:
+            self.poll_timer.stop()
+        self.worker.pool.clear()
         self.app.quit()
 
     def run(self):
@@ -1,14 +1,184 @@
 """Configuration management for wgtray."""
 
+import atexit
 import json
+import os
+import stat
 import subprocess
-import tomlkit
+import tempfile
+import threading
+import tomllib
 
 from .constants import CONFIG_DIR, CONFIG_FILE, LIBDIR, DEFAULT_CONFIG
 from .logger import logger
 
 CONFIG_FILE_JSON = CONFIG_DIR / "config.json"
 
+# Config key -> (TOML table, key in table)
+KEYS = {
+    "notifications": ("general", "notifications"),
+    "autoconnect": ("general", "autoconnect"),
+    "auto_reconnect": ("general", "auto_reconnect"),
+    "require_password": ("general", "require_password"),
+    "default_connection": ("connection", "default"),
+    "connect_policy": ("connection", "policy"),
+    "last_connection": ("connection", "last"),
+    "multi_tunnel": ("connection", "multi_tunnel"),
+    "tunnel_group": ("connection", "group"),
+    "icon_theme": ("appearance", "icon_theme"),
+    "show_latency": ("appearance", "show_latency"),
+    "peer_sort": ("appearance", "peer_sort"),
+    "peer_limit": ("appearance", "peer_limit"),
+    "monitor_mode": ("advanced", "monitor_mode"),
+    "poll_interval": ("advanced", "poll_interval"),
+    "rate_window": ("advanced", "rate_window"),
+    "metrics": ("advanced", "metrics"),
+    "log_format": ("advanced", "log_format"),
+    "tunnel_concurrency": ("advanced", "tunnel_concurrency"),
+    "handshake_timeout": ("advanced", "handshake_timeout"),
+    "stale_threshold": ("advanced", "stale_threshold"),
+}
+
+
+class ConfigStore:
+    """config.toml kept in memory and written back only when values change.
+
+    Writes are debounced by `delay` seconds and replace the file
+    atomically. The tomlkit document is edited in place, so comments and
+    formatting added by the user are kept.
+    """
+
+    def __init__(self, path=CONFIG_FILE, delay=1.0):
+        self.path = path
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._values = None
+        self._doc = None
+        self._stamp = None
+        self._pending = {}
+        self._timer = None
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self):
+        """Read the file and return a config dict with defaults filled in."""
+        config = DEFAULT_CONFIG.copy()
+        if not self.path.exists():
+            with self._lock:
+                self._values = {}
+            self.update(config)
+            return config
+
+        try:
+            with open(self.path, "rb") as f:
+                data = tomllib.load(f)
+        except Exception as e:
+            # Keep the broken file for the user to fix; don't overwrite it
+            logger.warning(f"Failed to load config: {e}")
+            with self._lock:
+                self._values = dict(config)
+            return config
+
+        for key, (table, name) in KEYS.items():
+            config[key] = data.get(table, {}).get(name, DEFAULT_CONFIG[key])
+        with self._lock:
+            self._values = dict(config)
+            self._doc = None
+        return config
+
+    def update(self, config):
+        """Record changed values and schedule a write.
+
+        Returns:
+            True if anything changed.
+        """
+        with self._lock:
+            if self._values is None:
+                self._values = {}
+            changed = {
+                key: config[key] for key in KEYS
+                if key in config and self._values.get(key, object()) != config[key]
+            }
+            if not changed:
+                return False
+            self._values.update(changed)
+            self._pending.update(changed)
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+        logger.debug(f"Config changed: {', '.join(sorted(changed))}")
+        return True
+
+    def flush(self):
+        """Write pending changes now.
+
+        On failure (e.g. config.toml does not parse) the changes stay
+        pending and go out with the next write.
+        """
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            try:
+                self._write(self._pending)
+            except Exception as e:
+                logger.warning(f"Failed to save config, keeping {len(self._pending)} change(s): {e}")
+                return
+            self._pending = {}
+
+    def _document(self):
+        """Return the tomlkit document, re-reading it if edited on disk."""
+        import tomlkit
+
+        stamp = self._file_stamp()
+        if self._doc is None or stamp != self._stamp:
+            if stamp is None:
+                self._doc = tomlkit.document()
+            else:
+                self._doc = tomlkit.parse(self.path.read_text())
+        return self._doc
+
+    def _write(self, pending):
+        import tomlkit
+
+        doc = self._document()
+        for key, value in pending.items():
+            table, name = KEYS[key]
+            if table not in doc:
+                doc[table] = tomlkit.table()
+            doc[table][name] = value
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".config.", suffix=".tmp")
+        try:
+            os.fchmod(fd, mode)
+            with os.fdopen(fd, "w") as f:
+                f.write(tomlkit.dumps(doc))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._stamp = self._file_stamp()
+
+
+_store = ConfigStore()
+atexit.register(_store.flush)
+
 
 def _migrate_from_json():
     """Migrate old JSON config to TOML."""
@@ -16,7 +186,8 @@ def _migrate_from_json():
         try:
             with open(CONFIG_FILE_JSON, "r") as f:
                 old_config = json.load(f)
-            save_config(old_config)
+            save_config({**DEFAULT_CONFIG, **old_config})
+            flush_config()
             CONFIG_FILE_JSON.rename(CONFIG_FILE_JSON.with_suffix(".json.bak"))
             logger.info("Migrated config from JSON to TOML")
         except Exception as e:
@@ -26,57 +197,17 @@ def _migrate_from_json():
 def load_config():
     """Load config from TOML file."""
     _migrate_from_json()
-    
-    if CONFIG_FILE.exists():
-        try:
-            with open(CONFIG_FILE, "r") as f:
-                doc = tomlkit.load(f)
-            return {
-                "notifications": doc.get("general", {}).get("notifications", DEFAULT_CONFIG["notifications"]),
-                "autoconnect": doc.get("general", {}).get("autoconnect", DEFAULT_CONFIG["autoconnect"]),
-                "require_password": doc.get("general", {}).get("require_password", DEFAULT_CONFIG["require_password"]),
-                "default_connection": doc.get("connection", {}).get("default", DEFAULT_CONFIG["default_connection"]),
-                "last_connection": doc.get("connection", {}).get("last", DEFAULT_CONFIG["last_connection"]),
-                "icon_theme": doc.get("appearance", {}).get("icon_theme", DEFAULT_CONFIG["icon_theme"]),
-                "monitor_mode": doc.get("advanced", {}).get("monitor_mode", DEFAULT_CONFIG["monitor_mode"]),
-                "poll_interval": doc.get("advanced", {}).get("poll_interval", DEFAULT_CONFIG["poll_interval"]),
-            }
-        except Exception as e:
-            logger.warning(f"Failed to load config: {e}")
-    
-    config = DEFAULT_CONFIG.copy()
-    save_config(config)
-    return config
+    return _store.load()
 
 
 def save_config(config):
-    """Save config to TOML file."""
-    CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
-    
-    doc = tomlkit.document()
-    
-    general = tomlkit.table()
-    general["notifications"] = config.get("notifications", DEFAULT_CONFIG["notifications"])
-    general["autoconnect"] = config.get("autoconnect", DEFAULT_CONFIG["autoconnect"])
-    general["require_password"] = config.get("require_password", DEFAULT_CONFIG["require_password"])
-    doc["general"] = general
-    
-    connection = tomlkit.table()
-    connection["default"] = config.get("default_connection", DEFAULT_CONFIG["default_connection"])
-    connection["last"] = config.get("last_connection", DEFAULT_CONFIG["last_connection"])
-    doc["connection"] = connection
-    
-    appearance = tomlkit.table()
-    appearance["icon_theme"] = config.get("icon_theme", DEFAULT_CONFIG["icon_theme"])
-    doc["appearance"] = appearance
-    
-    advanced = tomlkit.table()
-    advanced["monitor_mode"] = config.get("monitor_mode", DEFAULT_CONFIG["monitor_mode"])
-    advanced["poll_interval"] = config.get("poll_interval", DEFAULT_CONFIG["poll_interval"])
-    doc["advanced"] = advanced
-    
-    with open(CONFIG_FILE, "w") as f:
-        tomlkit.dump(doc, f)
+    """Save config to TOML file (debounced, only if something changed)."""
+    _store.update(config)
+
+
+def flush_config():
+    """Write any pending config changes immediately."""
+    _store.flush()
 
 
 def get_autostart_method():
@@ -0,0 +1,97 @@
+"""In-memory index of WireGuard configurations."""
+
+import os
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+from .constants import WG_CONFIG_DIR
+from .logger import logger
+from .wireguard import scan_configs
+
+
+class ConfigIndex(QObject):
+    """Sorted list of config names, kept current without re-listing on every read.
+
+    The directory is scanned once and rescanned when inotify (through
+    QFileSystemWatcher) reports a create, delete or rename in it. If the
+    directory cannot be watched (missing or unreadable), its ctime is
+    polled instead and the watch is retried.
+
+    `changed` fires when the list of names changes; `modified` when the
+    directory or a readable config in it changed but the names did not,
+    e.g. a config was edited in place or saved over.
+    """
+    changed = Signal()
+    modified = Signal()
+
+    def __init__(self, config_dir=WG_CONFIG_DIR, poll_interval=5000):
+        super().__init__()
+        self._dir = str(config_dir)
+        self._names = []
+        self._ctime = None
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(poll_interval)
+        self._poll_timer.timeout.connect(self._poll_check)
+
+        self.rescan()
+
+    def configs(self):
+        """Return the sorted config names."""
+        return self._names
+
+    def rescan(self):
+        """Re-read the directory and emit changed if the list differs.
+
+        Returns:
+            True if the list changed.
+        """
+        self._ensure_watch()
+        names = scan_configs(self._dir)
+        self._watch_files(names)
+        if names != self._names:
+            self._names = names
+            logger.debug(f"Config index: {len(names)} configs")
+            self.changed.emit()
+            return True
+        return False
+
+    def _watch_files(self, names):
+        # Only readable configs are parsed, so only those are worth a watch
+        watched = set(self._watcher.files())
+        paths = [path for path in (os.path.join(self._dir, f"{name}.conf") for name in names)
+                 if path not in watched and os.access(path, os.R_OK)]
+        if paths:
+            self._watcher.addPaths(paths)
+
+    def _on_directory_changed(self, _):
+        if not self.rescan():
+            self.modified.emit()
+
+    def _on_file_changed(self, path):
+        # Saving over a file drops its watch; rescan() adds it back
+        if not self.rescan():
+            self.modified.emit()
+
+    def _ensure_watch(self):
+        if self._dir in self._watcher.directories():
+            return
+        if os.access(self._dir, os.R_OK | os.X_OK) and self._watcher.addPath(self._dir):
+            logger.debug(f"Watching {self._dir}")
+            self._poll_timer.stop()
+        elif not self._poll_timer.isActive():
+            logger.debug(f"Cannot watch {self._dir}, polling instead")
+            self._poll_timer.start()
+
+    def _poll_check(self):
+        # ctime also changes on chmod, which is how the directory becomes readable
+        try:
+            ctime = os.stat(self._dir).st_ctime_ns
+        except OSError:
+            ctime = None
+        if ctime != self._ctime:
+            self._ctime = ctime
+            if not self.rescan():
+                self.modified.emit()
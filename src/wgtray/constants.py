@@ -1,5 +1,6 @@
 """Constants and paths for wgtray."""
 
+import os
 from pathlib import Path
 
 
@@ -25,9 +26,12 @@ VERSION = _CONF["VERSION"]
 HOOKS_DIR = Path(_CONF["HOOKS_DIR"])
 SUDOERS_DIR = Path(_CONF["SUDOERS_DIR"])
 EVENTS = _CONF["EVENTS"].split(",")
+HELPER_SOCKET = Path(os.environ.get("WGTRAY_HELPER_SOCKET", _CONF["HELPER_SOCKET"]))
 
 
 def find_libdir():
+    if os.environ.get("WGTRAY_LIBDIR"):
+        return Path(os.environ["WGTRAY_LIBDIR"])
     system_path = Path("/usr/lib/wgtray")
     return system_path if system_path.exists() else Path(__file__).parent.parent.parent / "src" / "lib"
 
@@ -40,9 +44,15 @@ def find_icondir():
 
 
 LIBDIR = find_libdir()
+WG_CONFIG_DIR = Path(os.environ.get("WG_TRAY_CONFIG_DIR", "/etc/wireguard"))
 ICONDIR = find_icondir()
 CONFIG_DIR = Path.home() / ".config" / "wgtray"
 CONFIG_FILE = CONFIG_DIR / "config.toml"
+DATA_DIR = Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share") / "wgtray"
+HISTORY_FILE = DATA_DIR / "handshakes.json"
+RUNTIME_DIR = Path(os.environ.get("XDG_RUNTIME_DIR") or Path.home() / ".cache") / "wgtray"
+METRICS_SOCKET = RUNTIME_DIR / "metrics.sock"
+CONTROL_SOCKET = RUNTIME_DIR / "control.sock"
 AUTOSTART_FILE = Path.home() / ".config" / "autostart" / "wgtray.desktop"
 SYSTEM_DESKTOP = Path("/usr/share/applications/wgtray.desktop")
 
@@ -60,10 +70,23 @@ ICONS = {
 DEFAULT_CONFIG = {
     "notifications": True,
     "autoconnect": False,
+    "auto_reconnect": True,
     "default_connection": "",
+    "connect_policy": "default",
     "last_connection": "",
+    "multi_tunnel": False,
+    "tunnel_group": [],
     "icon_theme": "auto",
+    "show_latency": False,
+    "peer_sort": "traffic",
+    "peer_limit": 10,
     "monitor_mode": "auto",
     "poll_interval": 5000,
+    "rate_window": 60,
+    "metrics": False,
+    "log_format": "text",
+    "tunnel_concurrency": 4,
+    "handshake_timeout": 10,
+    "stale_threshold": 180,
     "require_password": True,
 }
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""Control socket of the running wgtray instance, and its CLI client.
+
+The tray serves its in-memory state on a Unix socket, so scripts and
+status bars get answers without spawning wg:
+
+    wgtray --state              {"connected": true, "active": ["wg0"], ...}
+    wgtray --stats              per-interface traffic, rates and handshake
+    wgtray --watch              one JSON line per state change
+    wgtray --connect wg0        connect (switching from active tunnels)
+    wgtray --disconnect [wg0]   disconnect one or all tunnels
+
+Protocol: one JSON request per line, e.g. {"op": "state"}; one JSON
+reply per line ({"op": "watch"} keeps sending them).
+"""
+
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+from .constants import CONTROL_SOCKET
+from .logger import logger
+
+OPS = ("state", "stats", "watch", "connect", "disconnect")
+
+
+# === Server ===
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server.control
+        try:
+            request = json.loads(self.rfile.readline())
+            op = request["op"]
+        except (OSError, ValueError, TypeError, KeyError):
+            self._send({"ok": False, "error": "Malformed request"})
+            return
+
+        if op == "watch":
+            version = None
+            while True:
+                version, state = server.wait(version)
+                if state is None or not self._send(state):
+                    return
+        elif op in ("state", "stats"):
+            self._send(server.snapshot(op))
+        elif op in ("connect", "disconnect"):
+            self._send(server.command(op, request.get("name")))
+        else:
+            self._send({"ok": False, "error": f"Unknown op: {op}"})
+
+    def _send(self, reply):
+        try:
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+            return True
+        except OSError:
+            return False
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class ControlServer:
+    """Serve published tray state and forward commands.
+
+    Args:
+        dispatch: Called as dispatch(op, name) from a server thread; it
+            must hand the command over to the GUI thread (e.g. by
+            emitting a Qt signal).
+    """
+
+    def __init__(self, dispatch, path=CONTROL_SOCKET):
+        self.path = str(path)
+        self._dispatch = dispatch
+        self._cond = threading.Condition()
+        self._state = {"connected": False, "active": [], "busy": {}, "configs": []}
+        self._stats = {}
+        self._version = 0
+        self._server = None
+
+    def publish(self, state, stats):
+        """Replace the served state; wakes up --watch clients if it changed."""
+        with self._cond:
+            if state == self._state and stats == self._stats:
+                return
+            self._state = state
+            self._stats = stats
+            self._version += 1
+            self._cond.notify_all()
+
+    def snapshot(self, op="state"):
+        with self._cond:
+            if op == "stats":
+                return {"ok": True, "stats": self._stats}
+            return {"ok": True, **self._state}
+
+    def wait(self, version):
+        """Block until the state differs from `version`; (version, state)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != version or self._server is None)
+            if self._server is None:
+                return self._version, None
+            return self._version, {"ok": True, **self._state, "stats": self._stats}
+
+    def command(self, op, name):
+        with self._cond:
+            state = self._state
+        if op == "connect" and name not in state["configs"]:
+            return {"ok": False, "error": f"Unknown config: {name}"}
+        if op == "disconnect" and name is not None and name not in state["active"]:
+            return {"ok": False, "error": f"Not connected: {name}"}
+        self._dispatch(op, name)
+        return {"ok": True, "queued": True}
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = _Server(self.path, _Handler)
+        self._server.control = self
+        os.chmod(self.path, 0o600)
+        threading.Thread(target=self._server.serve_forever, name="control", daemon=True).start()
+        logger.debug(f"Control socket: {self.path}")
+
+    def stop(self):
+        if self._server:
+            server, self._server = self._server, None
+            with self._cond:
+                self._cond.notify_all()
+            server.shutdown()
+            server.server_close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+# === Client ===
+
+def connect(path=CONTROL_SOCKET, timeout=2):
+    """Open a connection to the running instance, or None if there is none."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def request(req, path=CONTROL_SOCKET, timeout=2):
+    """Send one request and return the reply, or None if wgtray is not running."""
+    sock = connect(path, timeout)
+    if sock is None:
+        return None
+    with sock:
+        try:
+            sock.sendall(json.dumps(req).encode() + b"\n")
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+            return json.loads(line) if line else None
+        except (OSError, ValueError):
+            return None
+
+
+def main(argv=None):
+    """CLI entry point; returns the exit code."""
+    argv = sys.argv[1:] if argv is None else argv
+    op = argv[0][2:] if argv and argv[0].startswith("--") else ""
+    if op not in OPS:
+        print(f"Usage: wgtray --{{{','.join(OPS)}}} [name]", file=sys.stderr)
+        return 2
+    req = {"op": op}
+    if len(argv) > 1:
+        req["name"] = argv[1]
+    elif op == "connect":
+        print("wgtray --connect needs a config name", file=sys.stderr)
+        return 2
+
+    if op == "watch":
+        sock = connect(timeout=None)
+        if sock is None:
+            print("wgtray is not running", file=sys.stderr)
+            return 1
+        with sock:
+            sock.sendall(json.dumps(req).encode() + b"\n")
+            try:
+                with sock.makefile("rb") as reader:
+                    for line in reader:
+                        sys.stdout.write(line.decode())
+                        sys.stdout.flush()
+            except KeyboardInterrupt:
+                pass
+        return 0
+
+    reply = request(req)
+    if reply is None:
+        print("wgtray is not running", file=sys.stderr)
+        return 1
+    if not reply.get("ok"):
+        print(reply.get("error"), file=sys.stderr)
+        return 1
+    reply.pop("ok")
+    print(json.dumps(reply))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""Privileged helper for wgtray.
+
+A long-lived root process that accepts JSON requests over a Unix socket,
+so connect, disconnect, stats and hooks no longer pay for a pkexec + bash
+spawn each. Started by systemd socket activation (wgtray-helper.socket) or
+manually once per session:
+
+    pkexec python3 -m wgtray.helper --socket /run/wgtray/helper.sock
+
+Protocol: one JSON value per line. A request is an object such as
+{"op": "connect", "name": "wg0"}, {"op": "stats", "names": ["wg0", "wg1"]} or
+{"op": "switch", "name": "wg1", "names": ["wg0"]} (down wg0, then up wg1);
+a list of requests is a batch and is executed in order. Each reply mirrors
+the request shape.
+"""
+
+import json
+import os
+import pwd
+import re
+import socket
+import socketserver
+import stat
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import HELPER_SOCKET, SUDOERS_DIR, EVENTS
+from .logger import logger
+from .metrics import timed
+
+# Same rule wg-quick applies to interface names; rejects paths
+INTERFACE_RE = re.compile(r"^[a-zA-Z0-9_=+.-]{1,15}$")
+
+CLIENT_TIMEOUT = 35
+SD_LISTEN_FDS_START = 3
+
+
+# === Client ===
+
+def available() -> bool:
+    """Check whether a helper socket is present."""
+    try:
+        return stat.S_ISSOCK(os.stat(HELPER_SOCKET).st_mode)
+    except OSError:
+        return False
+
+
+def call(request):
+    """Send a request (or list of requests) to the helper.
+
+    Returns:
+        The decoded reply, or None if the helper could not be reached.
+    """
+    op = "batch" if isinstance(request, list) else request.get("op")
+    with timed("wgtray_helper_request_duration_seconds", op=op) as labels:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(CLIENT_TIMEOUT)
+                sock.connect(str(HELPER_SOCKET))
+                sock.sendall(json.dumps(request).encode() + b"\n")
+                with sock.makefile("rb") as reader:
+                    line = reader.readline()
+            reply = json.loads(line) if line else None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Helper unavailable: {e}")
+            reply = None
+        labels["code"] = "unreachable" if reply is None else "ok"
+        return reply
+
+
+# === Server ===
+
+def _reply(code, output="", error=None, **extra):
+    return {"ok": code == 0, "code": code, "output": output, "error": error, **extra}
+
+
+def _run(cmd, timeout=30):
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        output = (result.stdout + result.stderr).strip()
+        return _reply(result.returncode, output, None if result.returncode == 0 else output)
+    except subprocess.TimeoutExpired:
+        return _reply(1, error="Timeout")
+    except OSError as e:
+        return _reply(1, error=str(e))
+
+
+def _peer_user(conn):
+    """Return the user name of the process on the other end of `conn`."""
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, 12)
+    uid = int.from_bytes(creds[4:8], sys.byteorder)
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+def _hook_allowed(user, interface, event):
+    """Apply the same rule as the sudoers entry created by hooks.sh."""
+    if user == "root":
+        return True
+    sudoers = SUDOERS_DIR / f"wgtray-{interface}-{event}"
+    try:
+        return sudoers.read_text().split(None, 1)[0] == user
+    except (OSError, IndexError):
+        return False
+
+
+def _op_connect(request, user):
+    return _run(["wg-quick", "up", request["name"]])
+
+
+def _op_disconnect(request, user):
+    name = request.get("name")
+    if name:
+        return _run(["wg-quick", "down", name])
+
+    result = _run(["wg", "show", "interfaces"])
+    if not result["ok"]:
+        return result
+    interfaces = result["output"].split()
+    if not interfaces:
+        return _reply(0)
+    with ThreadPoolExecutor(max_workers=min(len(interfaces), 8)) as pool:
+        results = list(pool.map(lambda iface: _run(["wg-quick", "down", iface]), interfaces))
+    return _reply(0 if all(r["ok"] for r in results) else 1)
+
+
+def _op_stats(request, user):
+    from . import wgnetlink
+    from .peers import parse_dump
+    from .wireguard import run_script
+
+    names = request.get("names") or [request["name"]]
+    try:
+        stats = wgnetlink.get_devices_stats(names)
+    except Exception:
+        output, code = run_script("stats.sh")
+        if code != 0:
+            return _reply(code, error=output)
+        stats = parse_dump(output)
+
+    # Peers travel as plain lists; see Peer.as_list()
+    stats = {
+        iface: {**s, "peers": [peer.as_list() for peer in s["peers"]]}
+        for iface, s in stats.items() if iface in names
+    }
+    if "names" in request:
+        return _reply(0, stats=stats)
+    if request["name"] not in stats:
+        return _reply(1, error=f"No such interface: {request['name']}")
+    return _reply(0, stats=stats[request["name"]])
+
+
+def _op_hook(request, user):
+    from .hooks import get_hook_path, execute_hook
+
+    interface, event = request["name"], request["event"]
+    if event not in EVENTS:
+        return _reply(1, error=f"Invalid event: {event}")
+    hook_path = get_hook_path(interface, event)
+    if not hook_path:
+        return _reply(0)
+    if not _hook_allowed(user, interface, event):
+        return _reply(1, error=f"{user} may not run {hook_path.name}")
+
+    ok, error, output = execute_hook(hook_path, interface, event, sudo=False)
+    return _reply(0 if ok else 1, output=output, error=error)
+
+
+def _op_switch(request, user):
+    """Tear down `names` and bring up `name`, running hooks in between."""
+    from .hooks import get_hook_path
+
+    steps = []
+    hook_output = []
+
+    def step(label, interface, fn):
+        start = time.monotonic()
+        result = fn()
+        steps.append([label, interface, round(time.monotonic() - start, 3),
+                      result["code"], result["error"]])
+        return result
+
+    def hook(interface, event):
+        if get_hook_path(interface, event):
+            result = step(event, interface, lambda: _op_hook({"name": interface, "event": event}, user))
+            if result["output"]:
+                hook_output.append([f"{interface}-{event}", result["output"]])
+
+    name = request["name"]
+    for iface in request.get("names") or []:
+        hook(iface, "pre-disconnect")
+        step("down", iface, lambda: _run(["wg-quick", "down", iface]))
+
+    hook(name, "pre-connect")
+    up = step("up", name, lambda: _run(["wg-quick", "up", name]))
+    if not up["ok"]:
+        return _reply(up["code"], error=up["error"], steps=steps, hook_output=hook_output)
+    hook(name, "post-connect")
+    return _reply(0, steps=steps, hook_output=hook_output)
+
+
+def _op_ping(request, user):
+    return _reply(0, output="pong")
+
+
+OPS = {
+    "connect": _op_connect,
+    "disconnect": _op_disconnect,
+    "stats": _op_stats,
+    "hook": _op_hook,
+    "switch": _op_switch,
+    "ping": _op_ping,
+}
+
+
+def handle_request(request, user):
+    """Validate and execute a single request."""
+    if not isinstance(request, dict):
+        return _reply(1, error="Malformed request")
+    op = OPS.get(request.get("op"))
+    if op is None:
+        return _reply(1, error=f"Unknown op: {request.get('op')}")
+
+    names = request.get("names")
+    if names is not None and not isinstance(names, list):
+        return _reply(1, error="names must be a list")
+    for name in [request.get("name")] + (names or []):
+        if name is not None and not (isinstance(name, str) and INTERFACE_RE.match(name)):
+            return _reply(1, error=f"Invalid interface name: {name!r}")
+    if op in (_op_connect, _op_hook, _op_switch) and not request.get("name"):
+        return _reply(1, error="No interface name provided")
+    if op is _op_stats and not (request.get("name") or names):
+        return _reply(1, error="No interface name provided")
+
+    try:
+        return op(request, user)
+    except Exception as e:
+        logger.error(f"Helper {request.get('op')} failed: {e}")
+        return _reply(1, error=str(e))
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        user = _peer_user(self.connection)
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                request = None
+                reply = _reply(1, error="Malformed request")
+            else:
+                if isinstance(request, list):
+                    reply = [handle_request(r, user) for r in request]
+                else:
+                    reply = handle_request(request, user)
+            logger.debug(f"{user}: {request} -> {reply}")
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def _listen_fd():
+    """Return the socket passed by systemd socket activation, if any."""
+    if os.environ.get("LISTEN_PID") != str(os.getpid()):
+        return None
+    if int(os.environ.get("LISTEN_FDS", "0")) < 1:
+        return None
+    return socket.socket(fileno=SD_LISTEN_FDS_START)
+
+
+def serve(path=None, mode=0o666):
+    """Serve requests until interrupted."""
+    activated = _listen_fd()
+    if activated is not None:
+        server = _Server(activated.getsockname(), _Handler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = activated
+        logger.info("Helper started via socket activation")
+    else:
+        path = str(path or HELPER_SOCKET)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(path)
+        server = _Server(path, _Handler)
+        os.chmod(path, mode)
+        logger.info(f"Helper listening on {path}")
+
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if activated is None:
+                os.unlink(path)
+
+
+def main():
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser(prog="wgtray-helper", description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", help=f"socket path (default: {HELPER_SOCKET})")
+    parser.add_argument("--mode", type=lambda v: int(v, 8), default=0o666,
+                        help="socket permissions when not socket-activated (default: 666)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    serve(args.socket, args.mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Per-config connection latency history for wgtray."""
+
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+from .constants import HISTORY_FILE
+from .logger import logger
+
+# Attempts kept per config
+HISTORY_SIZE = 50
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list."""
+    k = max(0, min(len(values) - 1, math.ceil(p / 100 * len(values)) - 1))
+    return values[k]
+
+
+class HandshakeHistory:
+    """Time-to-first-handshake of recent connects, persisted as JSON.
+
+    Each config keeps its last HISTORY_SIZE attempts as [time, seconds];
+    seconds is None when no handshake arrived before the timeout.
+    """
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to load handshake history: {e}")
+                self._entries = {}
+        return self._entries
+
+    def record(self, name, seconds):
+        """Add an attempt for `name` and write the history file."""
+        with self._lock:
+            entries = self._load()
+            attempts = entries.setdefault(name, [])
+            attempts.append([int(time.time()), None if seconds is None else round(seconds, 3)])
+            del attempts[:-HISTORY_SIZE]
+            data = json.dumps(entries)
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".history.", suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save handshake history: {e}")
+
+    def summary(self, name):
+        """Return {"p50", "p95", "count", "timeouts", "last_timeout"} or None."""
+        with self._lock:
+            attempts = list(self._load().get(name, []))
+        if not attempts:
+            return None
+        times = sorted(s for _, s in attempts if s is not None)
+        return {
+            "p50": percentile(times, 50) if times else None,
+            "p95": percentile(times, 95) if times else None,
+            "count": len(attempts),
+            "timeouts": len(attempts) - len(times),
+            "last_timeout": attempts[-1][1] is None,
+        }
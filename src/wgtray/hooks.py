@@ -2,9 +2,16 @@
 
 import subprocess
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from .constants import HOOKS_DIR
 from .logger import logger
+from .metrics import timed
+from . import helper
+
+HOOK_TIMEOUT = 30
 
 
 def get_hook_path(interface: str, event: str) -> Path | None:
@@ -16,8 +23,10 @@ def get_hook_path(interface: str, event: str) -> Path | None:
 
 
 def run_hook(interface: str, event: str) -> tuple[bool, str | None]:
-    """Run a hook script with sudo.
-    
+    """Run a hook script as root.
+
+    Uses the privileged helper when it is running, otherwise sudo.
+
     Args:
         interface: WireGuard interface name (e.g., 'wg0')
         event: Hook event ('pre-connect', 'post-connect', 'pre-disconnect')
@@ -28,32 +37,142 @@ def run_hook(interface: str, event: str) -> tuple[bool, str | None]:
     hook_path = get_hook_path(interface, event)
     if not hook_path:
         return True, None
+
+    with timed("wgtray_hook_duration_seconds", event=event) as labels:
+        ok, error = _run_hook(hook_path, interface, event)
+        labels["code"] = 0 if ok else 1
+    return ok, error
+
+
+def _run_hook(hook_path, interface, event):
+    if helper.available():
+        reply = helper.call({"op": "hook", "name": interface, "event": event})
+        if reply is not None:
+            # The helper logs to its own file: bring the output over here
+            log_hook_output(hook_path.name, reply.get("output"))
+            if not reply["ok"]:
+                logger.error(f"Hook failed: {hook_path}: {reply['error']}")
+            return reply["ok"], reply["error"]
+
+    ok, error, _ = execute_hook(hook_path, interface, event)
+    return ok, error
+
+
+def log_hook_output(hook_name, output):
+    """Log the stdout of a hook that ran elsewhere (e.g. in the helper)."""
+    for line in (output or "").splitlines():
+        logger.debug(f"[{hook_name}] {line}")
+
+
+def execute_hook(hook_path: Path, interface: str, event: str,
+                 sudo: bool = True) -> tuple[bool, str | None, str]:
+    """Execute a hook script, optionally through sudo.
+
+    Output is streamed into the log line by line while the hook runs:
+    stdout at debug, stderr as warnings.
     
-    logger.info(f"Running hook: {hook_path}")
+    Returns:
+        Tuple of (success, error_message, stdout)
+    """
+    fields = {"interface": interface, "event": event}
+    logger.info(f"Running hook: {hook_path}", extra=fields)
     
+    cmd = ["sudo", str(hook_path)] if sudo else [str(hook_path)]
+    prefix = f"[{hook_path.name}]"
+    stdout_lines = []
+    stderr_lines = []
+
+    def pump(stream, lines, log):
+        for line in stream:
+            line = line.rstrip("\n")
+            lines.append(line)
+            log(f"{prefix} {line}", extra=fields)
+
     try:
-        result = subprocess.run(
-            ["sudo", str(hook_path)],
-            capture_output=True,
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=30,
             env={**os.environ, "WGTRAY_INTERFACE": interface, "WGTRAY_EVENT": event}
         )
-        
-        if result.returncode != 0:
-            error = result.stderr.strip() or f"Exit code {result.returncode}"
-            logger.error(f"Hook failed: {hook_path}: {error}")
-            return False, error
-        
-        if result.stdout.strip():
-            logger.debug(f"Hook output: {result.stdout.strip()}")
-        
-        logger.info(f"Hook completed: {hook_path}")
-        return True, None
-        
-    except subprocess.TimeoutExpired:
-        logger.error(f"Hook timed out: {hook_path}")
-        return False, "Timeout (30s)"
     except Exception as e:
         logger.error(f"Hook error: {hook_path}: {e}")
-        return False, str(e)
\ No newline at end of file
+        return False, str(e), ""
+
+    readers = [
+        threading.Thread(target=pump, args=(proc.stdout, stdout_lines, logger.debug), daemon=True),
+        threading.Thread(target=pump, args=(proc.stderr, stderr_lines, logger.warning), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    try:
+        returncode = proc.wait(timeout=HOOK_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        logger.error(f"Hook timed out: {hook_path}", extra=fields)
+        return False, f"Timeout ({HOOK_TIMEOUT}s)", "\n".join(stdout_lines)
+    finally:
+        for reader in readers:
+            reader.join(1)
+
+    if returncode != 0:
+        error = "\n".join(stderr_lines).strip() or f"Exit code {returncode}"
+        logger.error(f"Hook failed: {hook_path}: {error}", extra={**fields, "code": returncode})
+        return False, error, "\n".join(stdout_lines)
+
+    logger.info(f"Hook completed: {hook_path}", extra={**fields, "code": 0})
+    return True, None, "\n".join(stdout_lines)
+
+
+class HookResult:
+    """Outcome of one hook run in run_hooks()."""
+    __slots__ = ("interface", "ok", "error", "duration")
+
+    def __init__(self, interface, ok, error, duration):
+        self.interface = interface
+        self.ok = ok
+        self.error = error
+        self.duration = duration
+
+
+def run_hooks(interfaces, event: str, max_workers: int = 4) -> list[HookResult]:
+    """Run the `event` hook for several interfaces concurrently.
+
+    Hooks of different interfaces are independent, so up to `max_workers`
+    of them run at once. Interfaces without a hook are skipped.
+
+    Returns:
+        One HookResult per hook that ran, in the given order.
+    """
+    def run_one(interface):
+        start = time.monotonic()
+        ok, error = run_hook(interface, event)
+        return HookResult(interface, ok, error, time.monotonic() - start)
+
+    pending = [iface for iface in interfaces if get_hook_path(iface, event)]
+    if not pending:
+        return []
+
+    start = time.monotonic()
+    if len(pending) == 1 or max_workers <= 1:
+        results = [run_one(iface) for iface in pending]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hook") as pool:
+            results = list(pool.map(run_one, pending))
+
+    failed = sum(1 for r in results if not r.ok)
+    details = ", ".join(
+        f"{r.interface} {r.duration:.2f}s {'ok' if r.ok else 'failed'}" for r in results
+    )
+    logger.info(f"Hooks {event}: {len(results)} run, {failed} failed in "
+                f"{time.monotonic() - start:.2f}s ({details})")
+    return results
+
+
+def format_hook_errors(results) -> str | None:
+    """Join the errors of failed HookResults into one message."""
+    errors = [f"{r.interface}: {r.error}" for r in results if not r.ok]
+    return "; ".join(errors) if errors else None
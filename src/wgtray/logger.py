@@ -1,50 +1,114 @@
-"""Logging configuration for wgtray."""
+"""Logging configuration for wgtray.
 
+Log calls only put the record on a queue; a listener thread formats it
+and does the file I/O and rotation, so callers on the GUI thread never
+wait for the disk.
+"""
+
+import atexit
+import json
 import logging
+import queue
+import time
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 LOG_DIR = Path.home() / ".local" / "share" / "wgtray"
 LOG_FILE = LOG_DIR / "wgtray.log"
+JSON_LOG_FILE = LOG_DIR / "wgtray.jsonl"
 MAX_LOG_SIZE = 1 * 1024 * 1024  # 1 MB
 BACKUP_COUNT = 3
 
+# Passed as extra={...} on log calls; written as JSON fields when present
+FIELDS = ("interface", "event", "duration_ms", "code", "metric", "script", "op")
+
 logger = logging.getLogger("wgtray")
 
+_listener = None
+_log_path = LOG_FILE
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, msg and the FIELDS a record has."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+                  + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
 
-def setup_logging(debug: bool = False):
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Same process: pass the record as is and format on the listener thread
+        return record
+
+
+def setup_logging(debug: bool = False, log_format: str = "text"):
     """Setup logging configuration.
-    
+
     Args:
-        debug: Enable debug level logging
+        debug: Enable debug level logging (and a copy on stdout)
+        log_format: "text", or "json" for JSON lines in wgtray.jsonl
     """
+    global _listener, _log_path
+    stop_logging()
+
     level = logging.DEBUG if debug else logging.INFO
     logger.setLevel(level)
     logger.handlers.clear()
-    
+
     formatter = logging.Formatter(
         "%(asctime)s [%(levelname)s] %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
     )
-    
+
     LOG_DIR.mkdir(parents=True, exist_ok=True)
+    _log_path = JSON_LOG_FILE if log_format == "json" else LOG_FILE
     file_handler = RotatingFileHandler(
-        LOG_FILE,
+        _log_path,
         maxBytes=MAX_LOG_SIZE,
         backupCount=BACKUP_COUNT
     )
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
+    file_handler.setFormatter(JsonFormatter() if log_format == "json" else formatter)
+    handlers = [file_handler]
+
     if debug:
         import sys
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-    
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(_QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers)
+    _listener.start()
+
     return logger
 
 
+def stop_logging():
+    """Write out queued records and stop the listener thread."""
+    global _listener
+    if _listener:
+        listener, _listener = _listener, None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(stop_logging)
+
+
 def get_log_path() -> Path:
     """Return the log file path."""
-    return LOG_FILE
\ No newline at end of file
+    return _log_path
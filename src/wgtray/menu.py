@@ -0,0 +1,71 @@
+"""Config entries of the tray menu, updated in place."""
+
+from PySide6.QtGui import QAction
+
+
+class ConfigActions:
+    """Keep one QAction per config in a menu.
+
+    update() compares the wanted entries with what is shown and only
+    adds, removes, moves or relabels what changed, so opening the menu
+    creates no Qt objects while the configs stay the same.
+
+    Args:
+        menu: The QMenu holding the entries.
+        anchor: Action the entries are kept in front of.
+        triggered: Called with the config name when an entry is clicked.
+    """
+
+    def __init__(self, menu, anchor, triggered):
+        self.menu = menu
+        self.anchor = anchor
+        self._triggered = triggered
+        self._actions = {}
+        self._shown = {}
+        self._order = []
+
+    def update(self, entries):
+        """Show `entries`, a list of (name, text, tooltip, enabled) in menu order."""
+        names = [entry[0] for entry in entries]
+        if names != self._order:
+            self._reorder(names)
+        for name, text, tooltip, enabled in entries:
+            if self._shown.get(name) == (text, tooltip, enabled):
+                continue
+            action = self._actions[name]
+            action.setText(text)
+            action.setToolTip(tooltip)
+            action.setEnabled(enabled)
+            self._shown[name] = (text, tooltip, enabled)
+
+    def _reorder(self, names):
+        wanted = set(names)
+        for name in self._order:
+            if name not in wanted:
+                action = self._actions.pop(name)
+                del self._shown[name]
+                self.menu.removeAction(action)
+                action.deleteLater()
+        kept = [name for name in self._order if name in wanted]
+
+        added = []
+        for name in names:
+            if name not in self._actions:
+                action = QAction(self.menu)
+                action.triggered.connect(lambda checked=False, n=name: self._triggered(n))
+                self._actions[name] = action
+                added.append(name)
+
+        if kept == [name for name in names if name in self._shown]:
+            # Same relative order: slot new entries in before their successor
+            following = self.anchor
+            for name in reversed(names):
+                if name in added:
+                    self.menu.insertAction(following, self._actions[name])
+                following = self._actions[name]
+        else:
+            for name in kept:
+                self.menu.removeAction(self._actions[name])
+            self.menu.insertActions(self.anchor, [self._actions[name] for name in names])
+        self._order = names
+
@@ -0,0 +1,229 @@
+"""In-memory timing metrics for wgtray.
+
+Hot paths record their duration into fixed-bucket histograms, and
+events are counted. The registry can be rendered in the Prometheus text format, served on an
+opt-in Unix socket, and summarized into the debug log.
+"""
+
+import logging
+import os
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+from .logger import logger
+
+# Upper bounds in seconds, from a fast netlink event up to a wg-quick timeout
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "wgtray_script_duration_seconds": "Helper script runs (pkexec or plain)",
+    "wgtray_helper_request_duration_seconds": "Requests to the privileged helper",
+    "wgtray_hook_duration_seconds": "Hook script runs",
+    "wgtray_netlink_event_duration_seconds": "Netlink event handling",
+    "wgtray_menu_build_duration_seconds": "Tray menu builds",
+    "wgtray_startup_duration_seconds": "Process start to first state shown",
+    "wgtray_recovery_duration_seconds": "Stale or suspended tunnel to first handshake after reconnect",
+    "wgtray_refresh_requests_total": "State refresh requests (netlink events, poll ticks, ...)",
+    "wgtray_refreshes_total": "State refreshes run after coalescing requests",
+}
+
+
+class Histogram:
+    """Cumulative fixed-bucket histogram."""
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+
+class Registry:
+    """Histograms and counters keyed by metric name and label set."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def counter(self, name, **labels):
+        """Current value of a counter; without labels, summed over all label sets."""
+        with self._lock:
+            if labels:
+                key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+                return self._counters.get(key, 0)
+            return sum(v for (n, _), v in self._counters.items() if n == name)
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def _snapshot(self):
+        with self._lock:
+            return sorted(
+                (key, list(h.counts), h.count, h.sum) for key, h in self._histograms.items()
+            )
+
+    def _counter_snapshot(self):
+        with self._lock:
+            return sorted(self._counters.items())
+
+    def render(self):
+        """Render all histograms in the Prometheus text exposition format."""
+        lines = []
+        current = None
+        for (name, labels), counts, count, total in self._snapshot():
+            if name != current:
+                current = name
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+            prefix = f"{label_str}," if label_str else ""
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {count}')
+            suffix = f"{{{label_str}}}" if label_str else ""
+            lines.append(f"{name}_sum{suffix} {total:.6f}")
+            lines.append(f"{name}_count{suffix} {count}")
+        current = None
+        for (name, labels), value in self._counter_snapshot():
+            if name != current:
+                current = name
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """One line per histogram with count, mean and approximate p95."""
+        lines = []
+        for (name, labels), counts, count, total in self._snapshot():
+            if not count:
+                continue
+            p95 = "+Inf"
+            seen = 0
+            for bound, n in zip(BUCKETS, counts):
+                seen += n
+                if seen >= 0.95 * count:
+                    p95 = f"{bound * 1000:g}ms"
+                    break
+            short = " ".join([name.removeprefix("wgtray_").removesuffix("_duration_seconds")]
+                             + [f"{k}={v}" for k, v in labels])
+            lines.append(f"{short}: n={count} mean={total / count * 1000:.1f}ms p95<={p95}")
+        for (name, labels), value in self._counter_snapshot():
+            short = " ".join([name.removeprefix("wgtray_")] + [f"{k}={v}" for k, v in labels])
+            lines.append(f"{short}: {value}")
+        return lines
+
+
+registry = Registry()
+
+
+@contextmanager
+def timed(name, **labels):
+    """Time the block and record it; set labels["code"] inside to tag the exit code."""
+    start = time.perf_counter()
+    try:
+        yield labels
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe(name, elapsed, **labels)
+        if logger.isEnabledFor(logging.DEBUG):
+            label_str = " ".join(f"{k}={v}" for k, v in labels.items())
+            logger.debug(f"Timing: {name} {label_str} {elapsed * 1000:.1f}ms",
+                         extra={**labels, "metric": name, "duration_ms": round(elapsed * 1000, 3)})
+
+
+class Timeline:
+    """Named checkpoints measured from a common start time (monotonic)."""
+
+    def __init__(self, start=None):
+        self.start = time.monotonic() if start is None else start
+        self.marks = []
+
+    def mark(self, label):
+        self.marks.append((label, time.monotonic() - self.start))
+
+    def finish(self, name):
+        """Log all checkpoints on one line and record the total as `name`."""
+        if not self.marks:
+            return
+        logger.info("Startup: " + ", ".join(f"{label} {t * 1000:.0f}ms" for label, t in self.marks))
+        registry.observe(name, self.marks[-1][1])
+
+
+def log_summary():
+    """Write the current metrics summary to the debug log."""
+    for line in registry.summary():
+        logger.debug(f"Metrics: {line}")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.connection.settimeout(1)
+        try:
+            request = self.rfile.readline()
+        except OSError:
+            request = b""
+        body = registry.render().encode()
+        if request.startswith(b"GET "):
+            # Enough HTTP for `curl --unix-socket`
+            while self.rfile.readline().strip():
+                pass
+            self.wfile.write(
+                b"HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            )
+        self.wfile.write(body)
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class MetricsServer:
+    """Serve the registry in Prometheus text format on a Unix socket."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._server = None
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = _Server(self.path, _Handler)
+        os.chmod(self.path, 0o600)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        logger.info(f"Metrics endpoint: {self.path}")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
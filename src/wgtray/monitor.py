@@ -1,61 +1,234 @@
-"""Network monitoring for wgtray."""
+"""Network monitoring for wgtray.
 
-import time
+Link changes come from a raw NETLINK_ROUTE socket subscribed to
+RTMGRP_LINK only. The monitor thread blocks in poll() on that socket
+and an eventfd, so it does not wake up while nothing changes and stops
+as soon as stop() writes to the eventfd.
+"""
+
+import errno
+import os
+import select
+import socket
+import struct
 from PySide6.QtCore import QThread, Signal
 from .logger import logger
+from .metrics import timed
+
+RTMGRP_LINK = 0x1
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+IFLA_IFNAME = 3
+IFLA_LINKINFO = 18
+IFLA_INFO_KIND = 1
+IFF_UP = 0x1
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_IFINFOMSG = struct.Struct("=BxHiII")
+_RTATTR = struct.Struct("=HH")
+RECV_SIZE = 65536
+DUMP_TIMEOUT = 2
+
+
+class LinkEvent:
+    """A link appeared, changed or went away."""
+    __slots__ = ("name", "kind", "index", "up", "removed")
+
+    def __init__(self, name, kind, index, up, removed):
+        self.name = name
+        self.kind = kind
+        self.index = index
+        self.up = up
+        self.removed = removed
+
+    def __repr__(self):
+        state = "removed" if self.removed else "up" if self.up else "down"
+        return f"LinkEvent({self.name}, {self.kind or '?'}, {state})"
+
+
+def _attrs(data, offset, end, wanted):
+    """Yield (type, payload) of the rtattrs in `wanted` between offset and end."""
+    while offset + _RTATTR.size <= end:
+        length, kind = _RTATTR.unpack_from(data, offset)
+        if length < _RTATTR.size:
+            break
+        if kind & 0x3FFF in wanted:
+            yield kind & 0x3FFF, data[offset + _RTATTR.size:offset + length]
+        offset += (length + 3) & ~3
+
+
+def _string(payload):
+    return bytes(payload).split(b"\0", 1)[0].decode(errors="replace")
+
+
+def parse_link(data, offset, length):
+    """Decode name, kind and flags of one RTM_NEWLINK/RTM_DELLINK message."""
+    msg_type = _NLMSGHDR.unpack_from(data, offset)[1]
+    start = offset + _NLMSGHDR.size
+    _, _, index, flags, _ = _IFINFOMSG.unpack_from(data, start)
+    name = kind = None
+    for attr, payload in _attrs(data, start + _IFINFOMSG.size, offset + length,
+                                (IFLA_IFNAME, IFLA_LINKINFO)):
+        if attr == IFLA_IFNAME:
+            name = _string(payload)
+        else:
+            for _, value in _attrs(payload, 0, len(payload), (IFLA_INFO_KIND,)):
+                kind = _string(value)
+    return LinkEvent(name or "", kind, index, bool(flags & IFF_UP), msg_type == RTM_DELLINK)
+
+
+def parse_messages(data):
+    """Yield (type, LinkEvent or None) for each netlink message in a datagram."""
+    data = memoryview(data)
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+        if length < _NLMSGHDR.size or offset + length > len(data):
+            break
+        if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+            yield msg_type, parse_link(data, offset, length)
+        elif msg_type == NLMSG_ERROR:
+            code = struct.unpack_from("=i", data, offset + _NLMSGHDR.size)[0]
+            if code:
+                raise OSError(-code, os.strerror(-code))
+        else:
+            yield msg_type, None
+        offset += (length + 3) & ~3
+
+
+def dump_links():
+    """List all links with one RTM_GETLINK dump on its own socket."""
+    links = []
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE) as sock:
+        # Bounded, so stop() never waits on a dump that does not finish
+        sock.settimeout(DUMP_TIMEOUT)
+        request = _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+        sock.send(_NLMSGHDR.pack(_NLMSGHDR.size + len(request), RTM_GETLINK,
+                                 NLM_F_REQUEST | NLM_F_DUMP, 1, 0) + request)
+        while True:
+            for msg_type, event in parse_messages(sock.recv(RECV_SIZE)):
+                if msg_type == NLMSG_DONE:
+                    return links
+                if event:
+                    links.append(event)
 
 
 class NetlinkMonitor(QThread):
-    """Monitor network interface changes via Netlink."""
-    changed = Signal()
+    """Monitor network interface changes via Netlink.
+
+    Keeps the set of WireGuard interfaces in memory: seeded with one
+    RTM_GETLINK dump, then updated from RTM_NEWLINK/RTM_DELLINK events.
+    `changed` carries a LinkEvent for each event on a WireGuard (or
+    wg*-named) link.
+    """
+    changed = Signal(object)
+    # Emitted once the interface set is seeded
+    ready = Signal()
+    # Emitted from run() when no netlink socket can be opened
+    failed = Signal(str)
 
     def __init__(self):
         super().__init__()
-        self._running = True
-        self._available = False
-        try:
-            from pyroute2 import IPRoute
-            with IPRoute():
-                pass
-            self._available = True
-            logger.debug("Netlink monitoring available")
-        except Exception as e:
-            logger.warning(f"Netlink not available: {e}")
+        self._wakeup = os.eventfd(0, os.EFD_CLOEXEC | os.EFD_NONBLOCK)
+        # Replaced, never mutated, so other threads can read it without a lock
+        self._interfaces = None
+
+    def interfaces(self):
+        """Return the active WireGuard interfaces, or None before the first dump."""
+        if self._interfaces is None:
+            return None
+        return sorted(self._interfaces)
+
+    def _seed(self):
+        names = {link.name for link in dump_links() if link.kind == "wireguard"}
+        self._interfaces = frozenset(names)
+        logger.debug(f"Netlink: seeded with {sorted(names)}")
 
-    @property
-    def available(self):
-        return self._available
+    def _handle_link(self, event):
+        is_wg = event.kind == "wireguard" or (
+            self._interfaces is not None and event.name in self._interfaces
+        )
+        if self._interfaces is not None:
+            if event.removed:
+                self._interfaces = self._interfaces - {event.name}
+            elif event.kind == "wireguard":
+                self._interfaces = self._interfaces | {event.name}
+
+        if is_wg or event.name.startswith("wg"):
+            logger.debug(f"Netlink: {event}", extra={
+                "interface": event.name,
+                "event": "removed" if event.removed else "up" if event.up else "down",
+            })
+            self.changed.emit(event)
 
     def run(self):
-        if not self._available:
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK))
+        except OSError as e:
+            logger.warning(f"Netlink not available: {e}")
+            self.failed.emit(str(e))
             return
 
-        from pyroute2 import IPRoute
-        with IPRoute() as ipr:
-            ipr.bind()
-            while self._running:
+        with sock:
+            sock.setblocking(False)
+            logger.debug("Netlink monitoring available")
+            # Subscribed first, so events during the dump queue up on `sock`
+            try:
+                self._seed()
+                self.ready.emit()
+            except OSError as e:
+                logger.warning(f"Netlink link dump failed: {e}")
+
+            poller = select.poll()
+            poller.register(sock, select.POLLIN)
+            poller.register(self._wakeup, select.POLLIN)
+            while True:
+                ready = {fd for fd, _ in poller.poll()}
+                if self._wakeup in ready:
+                    break
                 try:
-                    msgs = ipr.get(timeout=1)
-                    for msg in msgs:
-                        event = msg.get("event", "")
-                        if event in ("RTM_NEWLINK", "RTM_DELLINK"):
-                            attrs = dict(msg.get("attrs", []))
-                            ifname = attrs.get("IFLA_IFNAME", "")
-                            linkinfo = attrs.get("IFLA_LINKINFO")
-
-                            is_wg = False
-                            if linkinfo:
-                                li_attrs = dict(linkinfo.get("attrs", []))
-                                is_wg = li_attrs.get("IFLA_INFO_KIND") == "wireguard"
-
-                            if is_wg or ifname.startswith("wg"):
-                                logger.debug(f"Netlink: {ifname} {event}")
-                                self.changed.emit()
-                except Exception:
-                    if self._running:
-                        time.sleep(0.5)
+                    self._drain(sock)
+                except OSError as e:
+                    logger.warning(f"Netlink monitoring stopped: {e}")
+                    self.failed.emit(str(e))
+                    return
+
+    def _drain(self, sock):
+        while True:
+            try:
+                data = sock.recv(RECV_SIZE)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                # Events were dropped: start over from a fresh dump
+                logger.warning("Netlink: receive buffer overrun, re-reading links")
+                self._seed()
+                self.ready.emit()
+                continue
+            for _, event in parse_messages(data):
+                if event:
+                    label = "RTM_DELLINK" if event.removed else "RTM_NEWLINK"
+                    with timed("wgtray_netlink_event_duration_seconds", event=label):
+                        self._handle_link(event)
 
     def stop(self):
         logger.debug("Stopping Netlink monitor")
-        self._running = False
-        self.wait(2000)
\ No newline at end of file
+        if self._wakeup is None:
+            return
+        os.eventfd_write(self._wakeup, 1)
+        if not self.wait(DUMP_TIMEOUT * 1000 + 500):
+            # Leave the eventfd open: the thread still polls it on its way out
+            logger.warning("Netlink monitor did not stop in time")
+            return
+        os.close(self._wakeup)
+        self._wakeup = None
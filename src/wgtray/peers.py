@@ -0,0 +1,84 @@
+"""Per-peer WireGuard statistics."""
+
+import heapq
+
+
+class Peer:
+    """Compact per-peer record."""
+    __slots__ = ("public_key", "endpoint", "allowed_ips", "latest_handshake", "rx_bytes", "tx_bytes")
+
+    def __init__(self, public_key, endpoint, allowed_ips, latest_handshake, rx_bytes, tx_bytes):
+        self.public_key = public_key
+        self.endpoint = endpoint
+        self.allowed_ips = allowed_ips
+        self.latest_handshake = latest_handshake
+        self.rx_bytes = rx_bytes
+        self.tx_bytes = tx_bytes
+
+    def as_list(self):
+        """Return the fields as a JSON-friendly list (see Peer(*row))."""
+        return [self.public_key, self.endpoint, self.allowed_ips,
+                self.latest_handshake, self.rx_bytes, self.tx_bytes]
+
+    def __repr__(self):
+        return f"Peer({self.public_key[:8]}…, {self.endpoint}, ↓{self.rx_bytes} ↑{self.tx_bytes})"
+
+
+def summarize(peers):
+    """Build an interface stats dict from its peers."""
+    rx_total = 0
+    tx_total = 0
+    latest_hs = 0
+    for peer in peers:
+        rx_total += peer.rx_bytes
+        tx_total += peer.tx_bytes
+        if peer.latest_handshake > latest_hs:
+            latest_hs = peer.latest_handshake
+    return {
+        "rx_bytes": rx_total,
+        "tx_bytes": tx_total,
+        "latest_handshake": latest_hs if latest_hs > 0 else None,
+        "peers": peers,
+    }
+
+
+def parse_dump(output):
+    """Parse `wg show all dump` into per-interface stats with peers.
+
+    Interface lines have 5 tab-separated fields, peer lines 9:
+    interface, public key, preshared key, endpoint, allowed ips,
+    latest handshake, rx, tx, keepalive.
+
+    Returns:
+        Dict mapping interface name to a summarize() dict.
+    """
+    peers = {}
+    for line in output.splitlines():
+        fields = line.split("\t")
+        if len(fields) == 5:
+            peers.setdefault(fields[0], [])
+        elif len(fields) == 9:
+            try:
+                peer = Peer(
+                    fields[1],
+                    None if fields[3] == "(none)" else fields[3],
+                    "" if fields[4] == "(none)" else fields[4],
+                    int(fields[5]),
+                    int(fields[6]),
+                    int(fields[7]),
+                )
+            except ValueError:
+                continue
+            peers.setdefault(fields[0], []).append(peer)
+    return {iface: summarize(iface_peers) for iface, iface_peers in peers.items()}
+
+
+def top_peers(peers, limit=10, order="traffic"):
+    """Select the `limit` most interesting peers without a full sort.
+
+    Args:
+        order: "traffic" (most rx+tx first) or "stale" (oldest handshake first).
+    """
+    if order == "stale":
+        return heapq.nsmallest(limit, peers, key=lambda p: p.latest_handshake)
+    return heapq.nlargest(limit, peers, key=lambda p: p.rx_bytes + p.tx_bytes)
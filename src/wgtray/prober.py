@@ -0,0 +1,153 @@
+"""Endpoint round-trip time probing for wgtray.
+
+WireGuard ignores unauthenticated packets, so a probe cannot expect a
+reply from the tunnel itself. Instead, a UDP datagram and a TCP connect
+go to the endpoint at the same time and the first answer of any kind
+counts: a UDP reply or ICMP port unreachable, or a TCP SYN-ACK or RST.
+A host that drops everything times out.
+"""
+
+import asyncio
+import socket
+import threading
+import time
+from .logger import logger
+
+PROBE_TIMEOUT = 1.0
+PROBE_TTL = 60
+MAX_PROBES = 256
+
+
+def split_endpoint(endpoint):
+    """Split "host:port" or "[v6]:port" into (host, port)."""
+    host, _, port = endpoint.rpartition(":")
+    return host.strip("[]"), int(port)
+
+
+class _UDPProbe(asyncio.DatagramProtocol):
+    def __init__(self, done):
+        self.done = done
+
+    def datagram_received(self, data, addr):
+        if not self.done.done():
+            self.done.set_result(True)
+
+    def error_received(self, exc):
+        # ICMP unreachable took a round trip too
+        if not self.done.done():
+            self.done.set_result(isinstance(exc, ConnectionRefusedError))
+
+
+async def _probe_udp(loop, family, addr):
+    done = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _UDPProbe(done), remote_addr=addr[:2], family=family
+    )
+    try:
+        transport.sendto(b"\0")
+        if await done:
+            return
+        await asyncio.Future()  # other errors: leave it to TCP
+    finally:
+        transport.close()
+
+
+async def _probe_tcp(loop, family, addr):
+    try:
+        _, writer = await asyncio.open_connection(addr[0], addr[1], family=family)
+        writer.close()
+    except ConnectionRefusedError:
+        pass
+
+
+async def _probe(loop, endpoint, timeout):
+    """Return the RTT to `endpoint` in seconds, or None."""
+    start = time.perf_counter()
+    try:
+        host, port = split_endpoint(endpoint)
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(host, port, type=socket.SOCK_DGRAM), timeout
+        )
+        family, _, _, _, addr = infos[0]
+        remaining = timeout - (time.perf_counter() - start)
+        # DNS is not part of the round trip
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(_probe_udp(loop, family, addr)),
+                 asyncio.ensure_future(_probe_tcp(loop, family, addr))]
+        try:
+            for first in asyncio.as_completed(tasks, timeout=remaining):
+                try:
+                    await first
+                    return time.perf_counter() - start
+                except OSError:
+                    continue
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    except (OSError, ValueError, asyncio.TimeoutError):
+        pass
+    return None
+
+
+async def _probe_all(endpoints, timeout):
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(MAX_PROBES)
+
+    async def bounded(endpoint):
+        async with limit:
+            return await _probe(loop, endpoint, timeout)
+
+    return await asyncio.gather(*(bounded(e) for e in endpoints))
+
+
+def probe_endpoints(endpoints, timeout=PROBE_TIMEOUT):
+    """Probe all endpoints concurrently; blocks for about one `timeout`.
+
+    Returns:
+        Dict mapping endpoint to RTT in seconds, or None if unreachable.
+    """
+    endpoints = list(dict.fromkeys(endpoints))
+    if not endpoints:
+        return {}
+    start = time.monotonic()
+    results = dict(zip(endpoints, asyncio.run(_probe_all(endpoints, timeout))))
+    reachable = sum(1 for rtt in results.values() if rtt is not None)
+    logger.debug(f"Probed {len(endpoints)} endpoints in {time.monotonic() - start:.2f}s, "
+                 f"{reachable} reachable")
+    return results
+
+
+class EndpointProber:
+    """RTTs per endpoint, re-probed once older than `ttl` seconds."""
+
+    def __init__(self, ttl=PROBE_TTL, timeout=PROBE_TIMEOUT):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._results = {}
+
+    def fresh(self, endpoints):
+        """Cached results younger than the TTL: {endpoint: RTT or None}."""
+        now = time.monotonic()
+        with self._lock:
+            return {e: self._results[e][1] for e in endpoints
+                    if e in self._results and now - self._results[e][0] <= self.ttl}
+
+    def stale(self, endpoints):
+        """Endpoints without a fresh result."""
+        now = time.monotonic()
+        with self._lock:
+            return [e for e in endpoints
+                    if e not in self._results or now - self._results[e][0] > self.ttl]
+
+    def refresh(self, endpoints):
+        """Probe endpoints without a fresh result (blocks; run on the worker)."""
+        pending = self.stale(endpoints)
+        if not pending:
+            return
+        results = probe_endpoints(pending, self.timeout)
+        now = time.monotonic()
+        with self._lock:
+            for endpoint, rtt in results.items():
+                self._results[endpoint] = (now, rtt)
@@ -0,0 +1,111 @@
+"""Throughput sampling for wgtray."""
+
+import time
+from array import array
+
+
+class _Ring:
+    """Fixed-size ring of (timestamp, rx, tx) samples stored in flat arrays."""
+    __slots__ = ("ts", "rx", "tx", "start", "count")
+
+    def __init__(self, capacity):
+        self.ts = array("d", bytes(8 * capacity))
+        self.rx = array("Q", bytes(8 * capacity))
+        self.tx = array("Q", bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+
+    def append(self, ts, rx, tx):
+        capacity = len(self.ts)
+        i = (self.start + self.count) % capacity
+        self.ts[i] = ts
+        self.rx[i] = rx
+        self.tx[i] = tx
+        if self.count < capacity:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % capacity
+
+    def last(self):
+        i = (self.start + self.count - 1) % len(self.ts)
+        return self.ts[i], self.rx[i], self.tx[i]
+
+    def indices(self):
+        """Sample indices from oldest to newest."""
+        capacity = len(self.ts)
+        return [(self.start + n) % capacity for n in range(self.count)]
+
+
+class RateSampler:
+    """Per-interface byte counter samples and the rates derived from them.
+
+    Memory is bounded by `capacity` samples per interface; interfaces
+    that disappear from the stats are dropped.
+    """
+
+    def __init__(self, capacity=128, window=60):
+        self.capacity = capacity
+        self.window = window
+        self._rings = {}
+
+    def add(self, interface, rx_bytes, tx_bytes, ts=None):
+        """Record a counter sample for an interface."""
+        ts = time.monotonic() if ts is None else ts
+        ring = self._rings.get(interface)
+        if ring is None:
+            ring = self._rings[interface] = _Ring(self.capacity)
+        elif ring.count:
+            last_ts, last_rx, last_tx = ring.last()
+            if ts <= last_ts:
+                return
+            if rx_bytes < last_rx or tx_bytes < last_tx:
+                # Counters reset (interface re-created): start over
+                ring = self._rings[interface] = _Ring(self.capacity)
+        ring.append(ts, rx_bytes, tx_bytes)
+
+    def add_stats(self, stats, ts=None):
+        """Record a get_all_stats() result and forget vanished interfaces."""
+        ts = time.monotonic() if ts is None else ts
+        for interface in list(self._rings):
+            if interface not in stats:
+                del self._rings[interface]
+        for interface, s in stats.items():
+            self.add(interface, s["rx_bytes"], s["tx_bytes"], ts)
+
+    def rates(self, interface, window=None):
+        """Compute throughput in bytes/s over the last `window` seconds.
+
+        Returns:
+            Dict with rx/tx current, average and peak rates, or None with
+            fewer than two samples.
+        """
+        ring = self._rings.get(interface)
+        if ring is None or ring.count < 2:
+            return None
+
+        window = self.window if window is None else window
+        idx = ring.indices()
+        ts, rx, tx = ring.ts, ring.rx, ring.tx
+        cutoff = ts[idx[-1]] - window
+
+        first = len(idx) - 2
+        while first > 0 and ts[idx[first - 1]] >= cutoff:
+            first -= 1
+
+        rx_peak = tx_peak = 0.0
+        for a, b in zip(idx[first:], idx[first + 1:]):
+            dt = ts[b] - ts[a]
+            rx_peak = max(rx_peak, (rx[b] - rx[a]) / dt)
+            tx_peak = max(tx_peak, (tx[b] - tx[a]) / dt)
+
+        a, b = idx[-2], idx[-1]
+        dt = ts[b] - ts[a]
+        span = ts[b] - ts[idx[first]]
+        return {
+            "rx_rate": (rx[b] - rx[a]) / dt,
+            "tx_rate": (tx[b] - tx[a]) / dt,
+            "rx_avg": (rx[b] - rx[idx[first]]) / span,
+            "tx_avg": (tx[b] - tx[idx[first]]) / span,
+            "rx_peak": rx_peak,
+            "tx_peak": tx_peak,
+        }
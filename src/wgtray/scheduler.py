@@ -0,0 +1,81 @@
+"""Coalescing of state refresh requests for wgtray."""
+
+from PySide6.QtCore import QObject, QTimer
+from .logger import logger
+from .metrics import registry
+
+
+class RefreshScheduler(QObject):
+    """Fold bursts of refresh requests into one refresh.
+
+    A debounced request (e.g. a netlink event) waits until no further
+    request came in for `debounce` ms, but never longer than
+    `max_latency` ms after the first request of the burst, so a steady
+    stream of events cannot hold the refresh back. An immediate request
+    (e.g. a poll tick) runs at once, unless a refresh is already pending,
+    which it then joins. `configs` is OR-ed across merged requests.
+
+    Requests are counted per source in wgtray_refresh_requests_total,
+    refreshes in wgtray_refreshes_total.
+
+    Args:
+        refresh: Called as refresh(configs) on the GUI thread.
+    """
+
+    def __init__(self, refresh, debounce=300, max_latency=1000):
+        super().__init__()
+        self._refresh = refresh
+        self._pending = None
+        self._merged = 0
+
+        self._quiet = QTimer(self)
+        self._quiet.setSingleShot(True)
+        self._quiet.setInterval(debounce)
+        self._quiet.timeout.connect(self.flush)
+
+        self._deadline = QTimer(self)
+        self._deadline.setSingleShot(True)
+        self._deadline.setInterval(max_latency)
+        self._deadline.timeout.connect(self.flush)
+
+    @property
+    def pending(self):
+        return self._pending is not None
+
+    def request(self, source, configs=False, immediate=False):
+        registry.inc("wgtray_refresh_requests_total", source=source)
+        joined = self._pending is not None
+        self._pending = bool(self._pending) or configs
+        self._merged += 1
+        if immediate:
+            if not joined:
+                self.flush()
+            return
+        if not self._deadline.isActive():
+            self._deadline.start()
+        self._quiet.start()
+
+    def flush(self):
+        """Run the pending refresh now, if there is one."""
+        self._quiet.stop()
+        self._deadline.stop()
+        if self._pending is None:
+            return
+        configs, merged = self._pending, self._merged
+        self._pending = None
+        self._merged = 0
+        registry.inc("wgtray_refreshes_total")
+        if merged > 1:
+            logger.debug(f"Refresh: {merged} requests coalesced")
+        self._refresh(configs)
+
+    def cancel(self):
+        self._quiet.stop()
+        self._deadline.stop()
+        self._pending = None
+        self._merged = 0
+
+    def counters(self):
+        """(requests received, refreshes run) so far."""
+        return (registry.counter("wgtray_refresh_requests_total"),
+                registry.counter("wgtray_refreshes_total"))
@@ -4,10 +4,9 @@ from pathlib import Path
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel,
     QCheckBox, QComboBox, QPushButton, QGroupBox,
-    QSpinBox, QStyle
+    QSpinBox, QStyle, QLineEdit
 )
 from PySide6.QtCore import Qt, Signal
-from .config import get_autostart_method, set_autostart
 from .logger import get_log_path
 
 
@@ -15,7 +14,7 @@ class SettingsDialog(QDialog):
     refresh_clicked = Signal()
     about_clicked = Signal()
 
-    def __init__(self, config, configs_list, monitor_mode="unknown", parent=None):
+    def __init__(self, config, configs_list, monitor_mode="unknown", autostart_method="none", parent=None):
         super().__init__(parent)
         self.config = config.copy()
         self.configs_list = configs_list
@@ -36,8 +35,7 @@ class SettingsDialog(QDialog):
         self.autostart_combo.addItem("Off", "none")
         self.autostart_combo.addItem("XDG (Desktop Environments)", "xdg")
         self.autostart_combo.addItem("Systemd (Window Managers)", "systemd")
-        current_method = get_autostart_method()
-        idx = self.autostart_combo.findData(current_method)
+        idx = self.autostart_combo.findData(autostart_method)
         if idx >= 0:
             self.autostart_combo.setCurrentIndex(idx)
         autostart_layout.addWidget(self.autostart_combo, 1)
@@ -57,6 +55,10 @@ class SettingsDialog(QDialog):
         self.autoconnect_cb.setChecked(self.config.get("autoconnect", False))
         conn_layout.addWidget(self.autoconnect_cb)
 
+        self.auto_reconnect_cb = QCheckBox("Reconnect stale tunnels and after resume")
+        self.auto_reconnect_cb.setChecked(self.config.get("auto_reconnect", True))
+        conn_layout.addWidget(self.auto_reconnect_cb)
+
         self.require_password_cb = QCheckBox("Require password")
         self.require_password_cb.setChecked(self.config.get("require_password", True))
         conn_layout.addWidget(self.require_password_cb)
@@ -73,6 +75,30 @@ class SettingsDialog(QDialog):
         default_layout.addWidget(self.default_combo, 1)
         conn_layout.addLayout(default_layout)
 
+        policy_layout = QHBoxLayout()
+        policy_layout.addWidget(QLabel("Auto-connect to:"))
+        self.policy_combo = QComboBox()
+        self.policy_combo.addItem("Default VPN", "default")
+        self.policy_combo.addItem("Fastest endpoint", "fastest")
+        idx = self.policy_combo.findData(self.config.get("connect_policy", "default"))
+        if idx >= 0:
+            self.policy_combo.setCurrentIndex(idx)
+        policy_layout.addWidget(self.policy_combo, 1)
+        conn_layout.addLayout(policy_layout)
+
+        self.multi_cb = QCheckBox("Allow several tunnels at once")
+        self.multi_cb.setChecked(self.config.get("multi_tunnel", False))
+        conn_layout.addWidget(self.multi_cb)
+
+        group_layout = QHBoxLayout()
+        group_layout.addWidget(QLabel("Tunnel group:"))
+        self.group_edit = QLineEdit(", ".join(self.config.get("tunnel_group", [])))
+        self.group_edit.setPlaceholderText("wg0, wg1, …")
+        self.group_edit.setEnabled(self.multi_cb.isChecked())
+        self.multi_cb.toggled.connect(self.group_edit.setEnabled)
+        group_layout.addWidget(self.group_edit, 1)
+        conn_layout.addLayout(group_layout)
+
         layout.addWidget(conn_group)
 
         # === Appearance ===
@@ -91,6 +117,25 @@ class SettingsDialog(QDialog):
         theme_layout.addWidget(self.theme_combo, 1)
         appear_layout.addLayout(theme_layout)
 
+        self.latency_cb = QCheckBox("Show endpoint latency in menu")
+        self.latency_cb.setChecked(self.config.get("show_latency", False))
+        appear_layout.addWidget(self.latency_cb)
+
+        peers_layout = QHBoxLayout()
+        peers_layout.addWidget(QLabel("Peers in menu:"))
+        self.peer_sort_combo = QComboBox()
+        self.peer_sort_combo.addItem("Most traffic", "traffic")
+        self.peer_sort_combo.addItem("Stalest handshake", "stale")
+        idx = self.peer_sort_combo.findData(self.config.get("peer_sort", "traffic"))
+        if idx >= 0:
+            self.peer_sort_combo.setCurrentIndex(idx)
+        peers_layout.addWidget(self.peer_sort_combo, 1)
+        self.peer_limit_spin = QSpinBox()
+        self.peer_limit_spin.setRange(1, 100)
+        self.peer_limit_spin.setValue(self.config.get("peer_limit", 10))
+        peers_layout.addWidget(self.peer_limit_spin)
+        appear_layout.addLayout(peers_layout)
+
         layout.addWidget(appear_group)
 
         # === Advanced ===
@@ -119,6 +164,53 @@ class SettingsDialog(QDialog):
         poll_layout.addStretch()
         adv_layout.addLayout(poll_layout)
 
+        rate_layout = QHBoxLayout()
+        rate_layout.addWidget(QLabel("Rate window:"))
+        self.rate_spin = QSpinBox()
+        self.rate_spin.setRange(10, 600)
+        self.rate_spin.setSuffix(" sec")
+        self.rate_spin.setValue(self.config.get("rate_window", 60))
+        rate_layout.addWidget(self.rate_spin)
+        rate_layout.addStretch()
+        adv_layout.addLayout(rate_layout)
+
+        tunnel_layout = QHBoxLayout()
+        tunnel_layout.addWidget(QLabel("Parallel tunnels:"))
+        self.tunnel_spin = QSpinBox()
+        self.tunnel_spin.setRange(1, 16)
+        self.tunnel_spin.setValue(self.config.get("tunnel_concurrency", 4))
+        tunnel_layout.addWidget(self.tunnel_spin)
+        tunnel_layout.addStretch()
+        adv_layout.addLayout(tunnel_layout)
+
+        handshake_layout = QHBoxLayout()
+        handshake_layout.addWidget(QLabel("Handshake timeout:"))
+        self.handshake_spin = QSpinBox()
+        self.handshake_spin.setRange(2, 120)
+        self.handshake_spin.setSuffix(" sec")
+        self.handshake_spin.setValue(self.config.get("handshake_timeout", 10))
+        handshake_layout.addWidget(self.handshake_spin)
+        handshake_layout.addStretch()
+        adv_layout.addLayout(handshake_layout)
+
+        stale_layout = QHBoxLayout()
+        stale_layout.addWidget(QLabel("Stale after:"))
+        self.stale_spin = QSpinBox()
+        self.stale_spin.setRange(30, 3600)
+        self.stale_spin.setSuffix(" sec")
+        self.stale_spin.setValue(self.config.get("stale_threshold", 180))
+        stale_layout.addWidget(self.stale_spin)
+        stale_layout.addStretch()
+        adv_layout.addLayout(stale_layout)
+
+        self.metrics_cb = QCheckBox("Serve metrics on a local socket")
+        self.metrics_cb.setChecked(self.config.get("metrics", False))
+        adv_layout.addWidget(self.metrics_cb)
+
+        self.json_log_cb = QCheckBox("Structured log (JSON lines)")
+        self.json_log_cb.setChecked(self.config.get("log_format", "text") == "json")
+        adv_layout.addWidget(self.json_log_cb)
+
         layout.addWidget(adv_group)
 
         # === Info ===
@@ -166,17 +258,32 @@ class SettingsDialog(QDialog):
 
         layout.addLayout(btn_layout)
 
+    def autostart_method(self):
+        """Return the selected autostart method."""
+        return self.autostart_combo.currentData()
+
     def get_config(self):
         """Return updated config after dialog accepted."""
-        set_autostart(self.autostart_combo.currentData())
-
         return {
             **self.config,
             "notifications": self.notifications_cb.isChecked(),
             "autoconnect": self.autoconnect_cb.isChecked(),
+            "multi_tunnel": self.multi_cb.isChecked(),
+            "tunnel_group": [n for n in (x.strip() for x in self.group_edit.text().split(",")) if n],
+            "auto_reconnect": self.auto_reconnect_cb.isChecked(),
             "require_password": self.require_password_cb.isChecked(),
             "default_connection": self.default_combo.currentData(),
+            "connect_policy": self.policy_combo.currentData(),
+            "show_latency": self.latency_cb.isChecked(),
             "icon_theme": self.theme_combo.currentData(),
+            "peer_sort": self.peer_sort_combo.currentData(),
+            "peer_limit": self.peer_limit_spin.value(),
             "monitor_mode": self.monitor_combo.currentData(),
             "poll_interval": self.poll_spin.value() * 1000,
+            "rate_window": self.rate_spin.value(),
+            "metrics": self.metrics_cb.isChecked(),
+            "log_format": "json" if self.json_log_cb.isChecked() else "text",
+            "tunnel_concurrency": self.tunnel_spin.value(),
+            "handshake_timeout": self.handshake_spin.value(),
+            "stale_threshold": self.stale_spin.value(),
         }
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""Stale-handshake watchdog and suspend/resume detection for wgtray."""
+
+import os
+import time
+from PySide6.QtCore import QObject, Signal, Slot
+from .logger import logger
+from .metrics import registry
+
+
+class _Watch:
+    """Recovery state of one interface."""
+    __slots__ = ("trigger", "detected", "attempts", "in_flight")
+
+    def __init__(self, trigger, detected):
+        self.trigger = trigger
+        self.detected = detected
+        self.attempts = 0
+        self.in_flight = False
+
+
+class Watchdog:
+    """Decide which tunnels need a reconnect, and when to retry.
+
+    A tunnel is stale when its latest handshake is older than `threshold`
+    seconds (or it never had one and was first seen that long ago) while
+    it keeps sending without receiving anything, which is what a dead
+    endpoint looks like. Idle tunnels are left alone. After a
+    resume, tunnels that vanished are reconnected at once and the others
+    are judged from the next two samples. Failed reconnects are retried
+    after `base`, 2*`base`, ... up to `cap` seconds, at most
+    `max_attempts` times.
+    """
+
+    def __init__(self, threshold=180, base=1, cap=60, max_attempts=6):
+        self.threshold = threshold
+        self.base = base
+        self.cap = cap
+        self.max_attempts = max_attempts
+        self._last = {}
+        self._seen = {}
+        self._watches = {}
+        self._resumed_at = None
+
+    def observe(self, stats, now=None):
+        """Feed a get_all_stats() result.
+
+        Returns:
+            Interfaces that just went stale and should be reconnected.
+        """
+        now = time.time() if now is None else now
+        stale = []
+        for iface, s in stats.items():
+            last = self._last.get(iface)
+            self._last[iface] = (s["rx_bytes"], s["tx_bytes"])
+            seen = self._seen.setdefault(iface, now)
+            if last is None or iface in self._watches:
+                continue
+            hs = s["latest_handshake"]
+            sending = s["tx_bytes"] > last[1] and s["rx_bytes"] == last[0]
+            # Without any handshake yet, give it `threshold` from when it showed up
+            if sending and now - (hs or seen) > self.threshold:
+                if hs:
+                    logger.warning(f"Watchdog: {iface} is stale (handshake {int(now - hs)}s ago)")
+                else:
+                    logger.warning(f"Watchdog: {iface} is stale (no handshake in {int(now - seen)}s)")
+                self._watches[iface] = self._watch()
+                stale.append(iface)
+        for iface in list(self._last):
+            if iface not in stats:
+                del self._last[iface]
+                self._seen.pop(iface, None)
+        return stale
+
+    def _watch(self):
+        # Detected within a minute of a resume: count recovery from the resume
+        if self._resumed_at is not None and time.monotonic() - self._resumed_at < 60:
+            return _Watch("resume", self._resumed_at)
+        return _Watch("stale", time.monotonic())
+
+    def resumed(self, before, active):
+        """Handle a resume; `before` were up when the system went to sleep.
+
+        Returns:
+            Interfaces that are gone and should be brought up again.
+        """
+        self._resumed_at = time.monotonic()
+        self._last.clear()
+        self._seen.clear()
+        missing = [iface for iface in before if iface not in active and iface not in self._watches]
+        for iface in missing:
+            logger.warning(f"Watchdog: {iface} went away during suspend")
+            self._watches[iface] = self._watch()
+        return missing
+
+    def forget(self, iface):
+        """Stop tracking `iface` (e.g. the user disconnected it)."""
+        self._watches.pop(iface, None)
+        self._seen.pop(iface, None)
+
+    def watching(self, iface):
+        return iface in self._watches
+
+    def started(self, iface):
+        watch = self._watches.get(iface)
+        if watch:
+            watch.in_flight = True
+            watch.attempts += 1
+
+    def finished(self, iface, ok):
+        """Record the outcome of a reconnect.
+
+        Returns:
+            Seconds to wait before the next attempt, or None when done
+            (recovered or given up).
+        """
+        watch = self._watches.get(iface)
+        if watch is None:
+            return None
+        watch.in_flight = False
+        # A restarted tunnel gets a full threshold to complete a handshake
+        self._seen.pop(iface, None)
+        if ok:
+            del self._watches[iface]
+            elapsed = time.monotonic() - watch.detected
+            logger.info(f"Watchdog: {iface} recovered in {elapsed:.1f}s "
+                        f"({watch.trigger}, {watch.attempts} attempt(s))",
+                        extra={"interface": iface, "event": watch.trigger,
+                               "duration_ms": round(elapsed * 1000)})
+            registry.observe("wgtray_recovery_duration_seconds", elapsed, trigger=watch.trigger)
+            return None
+        if watch.attempts >= self.max_attempts:
+            del self._watches[iface]
+            logger.error(f"Watchdog: giving up on {iface} after {watch.attempts} attempts")
+            return None
+        delay = min(self.base * 2 ** (watch.attempts - 1), self.cap)
+        logger.info(f"Watchdog: retrying {iface} in {delay}s")
+        return delay
+
+
+class SleepMonitor(QObject):
+    """Relay logind's PrepareForSleep signal.
+
+    Set WGTRAY_SLEEP_BUS=session to listen on the session bus instead,
+    so a stand-in can emit the signal without suspending:
+
+        gdbus emit --session --object-path /org/freedesktop/login1 \\
+            --signal org.freedesktop.login1.Manager.PrepareForSleep false
+    """
+    sleeping = Signal()
+    resumed = Signal()
+
+    def start(self):
+        """Subscribe to the signal; returns False if D-Bus is unavailable."""
+        try:
+            from PySide6.QtCore import SLOT
+            from PySide6.QtDBus import QDBusConnection
+        except ImportError as e:
+            logger.warning(f"Suspend/resume detection unavailable: {e}")
+            return False
+
+        if os.environ.get("WGTRAY_SLEEP_BUS") == "session":
+            bus = QDBusConnection.sessionBus()
+        else:
+            bus = QDBusConnection.systemBus()
+        ok = bus.isConnected() and bus.connect(
+            "", "/org/freedesktop/login1", "org.freedesktop.login1.Manager",
+            "PrepareForSleep", self, SLOT("prepare_for_sleep(bool)")
+        )
+        if not ok:
+            logger.warning("Suspend/resume detection unavailable: cannot subscribe to logind")
+        return ok
+
+    @Slot(bool)
+    def prepare_for_sleep(self, going_down):
+        logger.info("System suspending" if going_down else "System resumed")
+        if going_down:
+            self.sleeping.emit()
+        else:
+            self.resumed.emit()
@@ -0,0 +1,269 @@
+"""WireGuard config file parsing and validation."""
+
+import base64
+import binascii
+import ipaddress
+import os
+import threading
+from .constants import WG_CONFIG_DIR
+
+# Keys wg(8) and wg-quick(8) accept, lower-cased
+INTERFACE_KEYS = {
+    "privatekey", "listenport", "fwmark",
+    "address", "dns", "mtu", "table", "preup", "postup", "predown", "postdown", "saveconfig",
+}
+PEER_KEYS = {"publickey", "presharedkey", "allowedips", "endpoint", "persistentkeepalive"}
+MULTI_KEYS = {"address", "dns", "allowedips", "preup", "postup", "predown", "postdown"}
+
+
+class PeerInfo:
+    """Peer section of a config."""
+    __slots__ = ("public_key", "endpoint", "allowed_ips", "keepalive")
+
+    def __init__(self, public_key, endpoint, allowed_ips, keepalive):
+        self.public_key = public_key
+        self.endpoint = endpoint
+        self.allowed_ips = allowed_ips
+        self.keepalive = keepalive
+
+
+class ConfigInfo:
+    """Metadata of one config; secrets are not kept.
+
+    `errors` are what wg-quick would reject; `warnings` are accepted by
+    wg-quick but likely mistakes.
+    """
+    __slots__ = ("name", "address", "dns", "listen_port", "mtu", "peers", "errors", "warnings")
+
+    def __init__(self, name, address, dns, listen_port, mtu, peers, errors, warnings=()):
+        self.name = name
+        self.address = address
+        self.dns = dns
+        self.listen_port = listen_port
+        self.mtu = mtu
+        self.peers = peers
+        self.errors = errors
+        self.warnings = list(warnings)
+
+    def summary(self):
+        """Multi-line description for a tooltip."""
+        lines = []
+        for peer in self.peers:
+            lines.append(f"Endpoint: {peer.endpoint or '(none)'}")
+        if self.address:
+            lines.append(f"Address: {', '.join(self.address)}")
+        if self.dns:
+            lines.append(f"DNS: {', '.join(self.dns)}")
+        allowed = [ip for peer in self.peers for ip in peer.allowed_ips]
+        if allowed:
+            shown = ", ".join(allowed[:4]) + (f", … ({len(allowed)})" if len(allowed) > 4 else "")
+            lines.append(f"Allowed IPs: {shown}")
+        lines.extend(f"⚠ {error}" for error in self.errors)
+        lines.extend(f"Note: {warning}" for warning in self.warnings)
+        return "\n".join(lines)
+
+
+def _split(value):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _check_key(value):
+    try:
+        return len(base64.b64decode(value, validate=True)) == 32
+    except (binascii.Error, ValueError):
+        return False
+
+
+def _check_port(value):
+    return value.isdigit() and int(value) <= 65535
+
+
+def _check_endpoint(value):
+    host, sep, port = value.rpartition(":")
+    if not sep or not host or not _check_port(port):
+        return False
+    if host.startswith("["):
+        if not host.endswith("]"):
+            return False
+        try:
+            ipaddress.IPv6Address(host[1:-1])
+        except ValueError:
+            return False
+    elif ":" in host:
+        # IPv6 needs brackets, or the last group passes for the port
+        return False
+    return True
+
+
+def parse_sections(text):
+    """Split config text into [(section, {key: [values]}, line)] like wg-quick.
+
+    Keys are lower-cased; everything after '#' is a comment.
+    """
+    sections = []
+    current = None
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            current = {}
+            sections.append((line[1:-1].strip().lower(), current, lineno))
+            continue
+        key, sep, value = line.partition("=")
+        if current is None or not sep:
+            sections.append(("", {"": [line]}, lineno))
+            continue
+        current.setdefault(key.strip().lower(), []).append(value.strip())
+    return sections
+
+
+def parse_config(name, text):
+    """Parse and validate a config; problems end up in ConfigInfo.errors/warnings."""
+    errors = []
+    warnings = []
+    address, dns, peers = [], [], []
+    listen_port = mtu = None
+    interfaces = 0
+
+    for section, keys, lineno in parse_sections(text):
+        if section == "interface":
+            interfaces += 1
+            allowed = INTERFACE_KEYS
+        elif section == "peer":
+            allowed = PEER_KEYS
+        elif section == "":
+            errors.append(f"Line {lineno}: not a key = value line")
+            continue
+        else:
+            errors.append(f"Line {lineno}: unknown section [{section}]")
+            continue
+
+        for key, values in keys.items():
+            if key not in allowed:
+                errors.append(f"[{section.title()}] unknown key {key}")
+            elif len(values) > 1 and key not in MULTI_KEYS:
+                # wg and wg-quick take the last one
+                warnings.append(f"[{section.title()}] {key} given {len(values)} times")
+
+        def first(key):
+            return keys.get(key, [None])[0]
+
+        def many(key):
+            return [item for value in keys.get(key, []) for item in _split(value)]
+
+        if section == "interface":
+            private_key = first("privatekey")
+            if not private_key:
+                # Allowed: e.g. set by "PostUp = wg set %i private-key ..."
+                if not (keys.get("preup") or keys.get("postup")):
+                    warnings.append("[Interface] PrivateKey missing")
+            elif not _check_key(private_key):
+                errors.append("[Interface] PrivateKey is not a valid key")
+            for cidr in many("address"):
+                try:
+                    ipaddress.ip_interface(cidr)
+                    address.append(cidr)
+                except ValueError:
+                    errors.append(f"[Interface] invalid Address {cidr}")
+            dns.extend(many("dns"))
+            port = first("listenport")
+            if port is not None:
+                if _check_port(port):
+                    listen_port = int(port)
+                else:
+                    errors.append(f"[Interface] invalid ListenPort {port}")
+            value = first("mtu")
+            if value is not None:
+                if value.isdigit():
+                    mtu = int(value)
+                else:
+                    errors.append(f"[Interface] invalid MTU {value}")
+        else:
+            public_key = first("publickey")
+            if not public_key:
+                errors.append("[Peer] PublicKey missing")
+            elif not _check_key(public_key):
+                errors.append(f"[Peer] PublicKey {public_key[:8]}… is not a valid key")
+            psk = first("presharedkey")
+            if psk is not None and not _check_key(psk):
+                errors.append("[Peer] PresharedKey is not a valid key")
+            allowed_ips = []
+            for cidr in many("allowedips"):
+                try:
+                    ipaddress.ip_network(cidr, strict=False)
+                    allowed_ips.append(cidr)
+                except ValueError:
+                    errors.append(f"[Peer] invalid AllowedIPs {cidr}")
+            endpoint = first("endpoint")
+            if endpoint is not None and not _check_endpoint(endpoint):
+                errors.append(f"[Peer] invalid Endpoint {endpoint}")
+                endpoint = None
+            keepalive = first("persistentkeepalive")
+            if keepalive is not None and keepalive != "off" and not _check_port(keepalive):
+                errors.append(f"[Peer] invalid PersistentKeepalive {keepalive}")
+            peers.append(PeerInfo(public_key, endpoint, allowed_ips, keepalive))
+
+    if interfaces != 1:
+        errors.append(f"{interfaces} [Interface] sections (need exactly one)")
+    return ConfigInfo(name, address, dns, listen_port, mtu, peers, errors, warnings)
+
+
+class ConfigCache:
+    """Parsed configs keyed by (path, mtime, size).
+
+    get() costs one stat() for an unchanged file; cached() returns the
+    last result without touching the file, for the menu. Call load()
+    (e.g. on the worker) when the files may have changed.
+    """
+
+    def __init__(self, config_dir=WG_CONFIG_DIR):
+        self.config_dir = config_dir
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, name):
+        """Return the ConfigInfo of `name`, or None if it cannot be read."""
+        path = os.path.join(self.config_dir, f"{name}.conf")
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(path, None)
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                info = parse_config(name, f.read())
+        except OSError:
+            # Usually root-only (0600); leave validation to wg-quick
+            info = None
+        with self._lock:
+            self._entries[path] = (stamp, info)
+        return info
+
+    def cached(self, name):
+        """Return the ConfigInfo last read for `name`, or None."""
+        path = os.path.join(self.config_dir, f"{name}.conf")
+        with self._lock:
+            entry = self._entries.get(path)
+        return entry[1] if entry else None
+
+    def load(self, names):
+        """Parse all `names` ahead of time (e.g. on the worker)."""
+        for name in names:
+            self.get(name)
+
+    def forget(self, names):
+        """Drop entries of configs not in `names`."""
+        keep = {os.path.join(self.config_dir, f"{name}.conf") for name in names}
+        with self._lock:
+            for path in list(self._entries):
+                if path not in keep:
+                    del self._entries[path]
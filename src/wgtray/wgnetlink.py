@@ -0,0 +1,134 @@
+"""WireGuard device queries over generic netlink."""
+
+import errno
+import ipaddress
+from .peers import Peer, summarize
+
+
+def _attr(nla, name, default=None):
+    """Return attribute `name` from a pyroute2 message or plain dict."""
+    if hasattr(nla, "get_attr"):
+        value = nla.get_attr(name)
+    else:
+        value = nla.get(name)
+    return default if value is None else value
+
+
+def _handshake_seconds(value):
+    """Convert a WGPEER_A_LAST_HANDSHAKE_TIME attribute to epoch seconds."""
+    if not value:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(_field(value, "tv_sec", 0))
+
+
+def _field(nla, name, default=None):
+    """Return a plain (non-attribute) field from a pyroute2 nla or dict."""
+    value = nla.get(name) if hasattr(nla, "get") else None
+    return default if value is None else value
+
+
+def _public_key(value):
+    if isinstance(value, (bytes, str)):
+        key = value
+    else:
+        key = _field(value, "key", b"")
+    return key.decode() if isinstance(key, bytes) else str(key)
+
+
+def _endpoint(value):
+    if not value:
+        return None
+    addr = _field(value, "addr")
+    port = _field(value, "port")
+    if not addr:
+        return None
+    return f"[{addr}]:{port}" if ":" in addr else f"{addr}:{port}"
+
+
+def _ip_address(value):
+    """Decode WGALLOWEDIP_A_IPADDR: raw bytes, an address, or pyroute2's "0a:00:00:00"."""
+    if isinstance(value, str):
+        try:
+            return str(ipaddress.ip_address(value))
+        except ValueError:
+            # pyroute2 hands over the raw address as colon-separated hex
+            try:
+                value = bytes.fromhex(value.replace(":", ""))
+            except ValueError:
+                return value
+    if isinstance(value, bytes):
+        try:
+            return str(ipaddress.ip_address(value))
+        except ValueError:
+            return None
+    return value
+
+
+def _allowed_ips(values):
+    ips = []
+    for allowed in values or []:
+        addr = _attr(allowed, "WGALLOWEDIP_A_IPADDR")
+        if isinstance(addr, (bytes, str)):
+            addr = _ip_address(addr)
+        else:
+            addr = _ip_address(_field(addr, "addr"))
+        mask = _attr(allowed, "WGALLOWEDIP_A_CIDR_MASK")
+        if addr:
+            ips.append(addr if mask is None or "/" in addr else f"{addr}/{mask}")
+    return ",".join(ips)
+
+
+def get_device_stats(interface):
+    """Query a single WireGuard device. See get_devices_stats()."""
+    return get_devices_stats([interface]).get(interface)
+
+
+def get_devices_stats(interfaces):
+    """Query WireGuard devices with WG_CMD_GET_DEVICE.
+
+    All devices are queried over one genl socket.
+
+    Returns:
+        Dict mapping interface to a peers.summarize() dict. Interfaces
+        that do not exist are left out.
+
+    Raises:
+        PermissionError: The kernel refused the request (needs CAP_NET_ADMIN).
+        OSError: The wireguard genl family is unavailable.
+    """
+    from pyroute2 import WireGuard
+    from pyroute2.netlink.exceptions import NetlinkError
+
+    stats = {}
+    try:
+        with WireGuard() as wg:
+            for interface in interfaces:
+                try:
+                    msgs = wg.info(interface)
+                except NetlinkError as e:
+                    if e.code == errno.ENODEV:
+                        continue
+                    raise
+                stats[interface] = summarize(_peers(msgs))
+    except NetlinkError as e:
+        if e.code in (errno.EPERM, errno.EACCES):
+            raise PermissionError(e.code, "WG_CMD_GET_DEVICE denied") from e
+        raise OSError(e.code, str(e)) from e
+    return stats
+
+
+def _peers(msgs):
+    peers = []
+    for msg in msgs:
+        for peer in _attr(msg, "WGDEVICE_A_PEERS", []):
+            peers.append(Peer(
+                _public_key(_attr(peer, "WGPEER_A_PUBLIC_KEY", b"")),
+                _endpoint(_attr(peer, "WGPEER_A_ENDPOINT")),
+                _allowed_ips(_attr(peer, "WGPEER_A_ALLOWEDIPS")),
+                _handshake_seconds(_attr(peer, "WGPEER_A_LAST_HANDSHAKE_TIME")),
+                _attr(peer, "WGPEER_A_RX_BYTES", 0),
+                _attr(peer, "WGPEER_A_TX_BYTES", 0),
+            ))
+    return peers
@@ -4,13 +4,23 @@ import subprocess
 import sys
 import os
 import time
-from pathlib import Path
-from .constants import LIBDIR
-from .hooks import run_hook
+from concurrent.futures import ThreadPoolExecutor
+from .constants import LIBDIR, WG_CONFIG_DIR
+from .hooks import format_hook_errors, log_hook_output, run_hook, run_hooks
 from .logger import logger
+from .metrics import timed
+from .peers import Peer, parse_dump
+from . import helper, wgnetlink
 
+# Cleared once generic netlink stats are refused, so we stop retrying
+_netlink_stats = True
 
-def run_script(script_name, *args, use_pkexec=False):
+# Optional in-memory providers (see set_active_source/set_config_source)
+_active_source = None
+_config_source = None
+
+
+def run_script(script_name, *args, use_pkexec=False, timeout=30):
     """Run a helper script, optionally with pkexec for root privileges."""
     script_path = LIBDIR / script_name
     if not script_path.exists():
@@ -20,13 +30,31 @@ def run_script(script_name, *args, use_pkexec=False):
     cmd = ["pkexec", str(script_path)] if use_pkexec else [str(script_path)]
     cmd.extend(args)
 
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        return result.stdout.strip(), result.returncode
-    except subprocess.TimeoutExpired:
-        return "Timeout", 1
-    except Exception as e:
-        return str(e), 1
+    with timed("wgtray_script_duration_seconds", script=script_name, pkexec=use_pkexec) as labels:
+        labels["code"] = 1
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            labels["code"] = result.returncode
+            return result.stdout.strip(), result.returncode
+        except subprocess.TimeoutExpired:
+            labels["code"] = "timeout"
+            return "Timeout", 1
+        except Exception as e:
+            return str(e), 1
+
+
+def run_privileged(request, script_name, *args):
+    """Run a privileged operation through the helper, or pkexec the script.
+
+    Returns:
+        Tuple of (output, returncode) like run_script().
+    """
+    if helper.available():
+        reply = helper.call(request)
+        if reply is not None:
+            return reply["output"] or reply["error"] or "", reply["code"]
+        logger.warning("Helper not responding, falling back to pkexec")
+    return run_script(script_name, *args, use_pkexec=True)
 
 
 def authenticate() -> bool:
@@ -40,54 +68,143 @@ def authenticate() -> bool:
         logger.warning(f"Auth script not found: {auth_script}")
         return True
     
-    try:
-        result = subprocess.run(
-            ["pkexec", str(auth_script)],
-            capture_output=True,
-            timeout=60
-        )
-        return result.returncode == 0
-    except subprocess.TimeoutExpired:
-        logger.error("Authentication timed out")
-        return False
-    except Exception as e:
-        logger.error(f"Authentication error: {e}")
-        return False
+    with timed("wgtray_script_duration_seconds", script="auth.sh", pkexec=True) as labels:
+        labels["code"] = 1
+        try:
+            result = subprocess.run(
+                ["pkexec", str(auth_script)],
+                capture_output=True,
+                timeout=60
+            )
+            labels["code"] = result.returncode
+            return result.returncode == 0
+        except subprocess.TimeoutExpired:
+            labels["code"] = "timeout"
+            logger.error("Authentication timed out")
+            return False
+        except Exception as e:
+            logger.error(f"Authentication error: {e}")
+            return False
+
+
+def set_active_source(source):
+    """Answer get_active_connections() from memory instead of status.sh.
+
+    Args:
+        source: Callable returning a list of interfaces, or None while it
+            has no data yet (e.g. NetlinkMonitor.interfaces). Pass None to
+            go back to status.sh.
+    """
+    global _active_source
+    _active_source = source
 
 
 def get_active_connections():
     """Get list of active WireGuard interfaces."""
+    if _active_source is not None:
+        active = _active_source()
+        if active is not None:
+            return active
+
     output, code = run_script("status.sh")
     if code == 0 and output:
         return [x for x in output.split("\n") if x]
     return []
 
 
+def set_config_source(source):
+    """Answer get_configs() from memory (e.g. ConfigIndex.configs).
+
+    Pass None to scan the config directory on every call again.
+    """
+    global _config_source
+    _config_source = source
+
+
+def scan_configs(config_dir=WG_CONFIG_DIR):
+    """List configuration names in config_dir, sorted."""
+    try:
+        with os.scandir(config_dir) as entries:
+            return sorted(
+                entry.name[:-5] for entry in entries
+                if entry.name.endswith(".conf") and entry.is_file()
+            )
+    except OSError:
+        return []
+
+
 def get_configs():
     """Get list of available WireGuard configurations."""
-    output, code = run_script("list-configs.sh")
-    if code == 0 and output:
-        return [x for x in output.split("\n") if x]
-    return []
+    if _config_source is not None:
+        return _config_source()
+    return scan_configs()
 
 
 def get_connection_stats(interface):
-    """Get connection stats for a WireGuard interface."""
-    output, code = run_script("stats.sh", interface, use_pkexec=True)
-    if code != 0 or not output:
-        return None
-    
-    try:
-        parts = output.split()
-        if len(parts) >= 3:
+    """Get connection stats for a single WireGuard interface."""
+    return get_all_stats([interface]).get(interface)
+
+
+def handshake_since(stats, since):
+    """Seconds from `since` (wall clock) to the first handshake in `stats`.
+
+    Args:
+        stats: One interface's entry of a get_all_stats() result, or None.
+
+    Returns:
+        The delay, or None if there was no handshake since `since` yet.
+    """
+    hs = stats and stats["latest_handshake"]
+    if hs and hs >= int(since):
+        # latest_handshake has 1 s resolution; we saw it no later than now
+        return max(0.0, min(time.time(), hs + 1) - since)
+    return None
+
+
+def get_all_stats(interfaces=None):
+    """Get connection stats for several WireGuard interfaces in one call.
+
+    Queries the kernel over generic netlink, then the privileged helper,
+    and finally a single pkexec stats.sh (one `wg show all dump`), so the
+    cost does not grow with the number of interfaces.
+
+    Args:
+        interfaces: Interfaces to query; defaults to all active ones.
+
+    Returns:
+        Dict mapping interface name to a dict with rx_bytes, tx_bytes,
+        latest_handshake and peers (list of Peer). Interfaces without
+        stats are left out.
+    """
+    global _netlink_stats
+    if interfaces is None:
+        interfaces = get_active_connections()
+    if not interfaces:
+        return {}
+
+    if _netlink_stats:
+        try:
+            return wgnetlink.get_devices_stats(interfaces)
+        except PermissionError:
+            logger.info("Netlink stats denied, falling back to stats.sh")
+            _netlink_stats = False
+        except Exception as e:
+            logger.warning(f"Netlink stats unavailable, falling back to stats.sh: {e}")
+            _netlink_stats = False
+
+    if helper.available():
+        reply = helper.call({"op": "stats", "names": list(interfaces)})
+        if reply is not None and reply["ok"]:
             return {
-                "rx_bytes": int(parts[0]),
-                "tx_bytes": int(parts[1]),
-                "latest_handshake": int(parts[2]) if int(parts[2]) > 0 else None
+                iface: {**s, "peers": [Peer(*row) for row in s["peers"]]}
+                for iface, s in reply["stats"].items()
             }
-    except (ValueError, IndexError):
-        pass
-    return None
+
+    output, code = run_script("stats.sh", use_pkexec=True)
+    if code != 0 or not output:
+        return {}
+    stats = parse_dump(output)
+    return {iface: stats[iface] for iface in interfaces if iface in stats}
 
 
 def format_bytes(bytes_val):
@@ -102,6 +219,11 @@ def format_bytes(bytes_val):
         return f"{bytes_val / (1024 * 1024 * 1024):.2f} GB"
 
 
+def format_rate(bytes_per_sec):
+    """Format a throughput in bytes/s to human readable string."""
+    return f"{format_bytes(int(bytes_per_sec))}/s"
+
+
 def format_handshake(timestamp):
     """Format handshake timestamp to human readable string."""
     if not timestamp:
@@ -137,7 +259,7 @@ def connect(name, require_password=True):
         logger.warning(f"Pre-connect hook failed for {name}: {hook_err}")
     
     # Connect
-    _, code = run_script("connect.sh", name, use_pkexec=True)
+    _, code = run_privileged({"op": "connect", "name": name}, "connect.sh", name)
     
     if code == 0:
         # Post-connect hook
@@ -149,14 +271,72 @@ def connect(name, require_password=True):
     return False, None, False
 
 
+def _parse_steps(output):
+    """Parse the "step" lines printed by switch.sh."""
+    steps = []
+    for line in output.splitlines():
+        fields = line.split("\t")
+        if len(fields) == 5 and fields[0] == "step":
+            try:
+                steps.append([fields[1], fields[2], int(fields[3]) / 1000, int(fields[4]), None])
+            except ValueError:
+                continue
+    return steps
+
+
+def switch(old, name, require_password=True):
+    """Disconnect `old` interfaces and connect to `name` in one privileged call.
+
+    Hooks run in the usual order: pre-disconnect and down for each old
+    interface, then pre-connect, up and post-connect for `name`.
+
+    Returns:
+        Tuple of (success, hook_error, cancelled, steps); steps is a list
+        of [step, interface, seconds, code, error].
+    """
+    if require_password:
+        if not authenticate():
+            logger.info("Authentication cancelled")
+            return False, None, True, []
+
+    start = time.monotonic()
+    steps = None
+    if helper.available():
+        reply = helper.call({"op": "switch", "name": name, "names": list(old)})
+        if reply is None:
+            logger.warning("Helper not responding, falling back to pkexec")
+        elif "steps" in reply:
+            code, steps = reply["code"], reply["steps"]
+            for hook_name, output in reply.get("hook_output", []):
+                log_hook_output(hook_name, output)
+        else:
+            logger.warning(f"Helper cannot switch ({reply['error']}), falling back to pkexec")
+    if steps is None:
+        # Each hook may take up to 30 s, on top of wg-quick itself
+        output, code = run_script("switch.sh", name, *old, use_pkexec=True,
+                                  timeout=30 + 30 * (2 * len(old) + 2))
+        steps = _parse_steps(output)
+
+    summary = ", ".join(f"{s[0]} {s[1]} {s[2]:.2f}s" + ("" if s[3] == 0 else f" (exit {s[3]})")
+                        for s in steps)
+    logger.info(f"Switch {'+'.join(old) or '-'} → {name} in {time.monotonic() - start:.2f}s: {summary}")
+
+    hook_errors = [f"{s[1]}: {s[4] or f'Exit code {s[3]}'}" for s in steps
+                   if s[0] in ("pre-disconnect", "pre-connect", "post-connect") and s[3] != 0]
+    if code != 0:
+        return False, None, False, steps
+    return True, "; ".join(hook_errors) if hook_errors else None, False, steps
+
+
 def disconnect(name=None, require_password=True):
     """Disconnect from WireGuard VPN(s).
+
+    Without a name, the pre-disconnect hooks of all active interfaces run
+    concurrently.
     
     Returns:
         Tuple of (success, hook_error, cancelled)
     """
-    hook_errors = []
-    
     # Get interfaces
     interfaces = [name] if name else get_active_connections()
     if not interfaces:
@@ -169,28 +349,78 @@ def disconnect(name=None, require_password=True):
             return False, None, True
     
     # Pre-disconnect hooks
-    for iface in interfaces:
-        hook_ok, hook_err = run_hook(iface, "pre-disconnect")
-        if not hook_ok:
-            hook_errors.append(f"{iface}: {hook_err}")
+    hook_error = format_hook_errors(run_hooks(interfaces, "pre-disconnect"))
     
     # Disconnect
     if name:
-        _, code = run_script("disconnect.sh", name, use_pkexec=True)
+        _, code = run_privileged({"op": "disconnect", "name": name}, "disconnect.sh", name)
     else:
-        _, code = run_script("disconnect.sh", use_pkexec=True)
+        _, code = run_privileged({"op": "disconnect"}, "disconnect.sh")
     
-    hook_error = "; ".join(hook_errors) if hook_errors else None
     return code == 0, hook_error, False
 
 
+def _in_parallel(fn, names, max_workers, label):
+    """Run fn(name) -> (success, hook_error) for each name on a bounded pool.
+
+    Returns:
+        List of (name, success, hook_error, seconds), in the given order.
+    """
+    def run_one(name):
+        start = time.monotonic()
+        try:
+            success, hook_error = fn(name)
+        except Exception as e:
+            logger.error(f"{label} {name} failed: {e}")
+            success, hook_error = False, None
+        return name, success, hook_error, time.monotonic() - start
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix=label) as pool:
+        results = list(pool.map(run_one, names))
+
+    details = ", ".join(f"{n} {t:.2f}s {'ok' if ok else 'failed'}" for n, ok, _, t in results)
+    logger.info(f"{label}: {len(results)} tunnels in {time.monotonic() - start:.2f}s ({details})")
+    return results
+
+
+def connect_many(names, require_password=True, max_workers=4):
+    """Bring up several tunnels in parallel, keeping the active ones.
+
+    Each tunnel runs its own pre-connect hook, wg-quick up and
+    post-connect hook; at most `max_workers` tunnels at a time.
+
+    Returns:
+        Tuple of (results, cancelled); results as in _in_parallel().
+    """
+    if require_password and not authenticate():
+        logger.info("Authentication cancelled")
+        return [], True
+    return _in_parallel(
+        lambda name: connect(name, require_password=False)[:2], names, max_workers, "up"
+    ), False
+
+
+def disconnect_many(names, require_password=True, max_workers=4):
+    """Tear down several tunnels in parallel (pre-disconnect hook + down each).
+
+    Returns:
+        Tuple of (results, cancelled); results as in _in_parallel().
+    """
+    if require_password and not authenticate():
+        logger.info("Authentication cancelled")
+        return [], True
+    return _in_parallel(
+        lambda name: disconnect(name, require_password=False)[:2], names, max_workers, "down"
+    ), False
+
+
 def check_config_dir_permissions():
-    """Ensure /etc/wireguard is readable."""
-    config_dir = Path("/etc/wireguard")
-    if config_dir.exists() and not os.access(config_dir, os.R_OK):
-        subprocess.run(["pkexec", "chmod", "755", str(config_dir)], check=False)
+    """Ensure the config directory is readable."""
+    if WG_CONFIG_DIR.exists() and not os.access(WG_CONFIG_DIR, os.R_OK):
+        subprocess.run(["pkexec", "chmod", "755", str(WG_CONFIG_DIR)], check=False)
 
 
 def open_config_folder():
-    """Open /etc/wireguard in file manager."""
-    subprocess.run(["xdg-open", "/etc/wireguard"], check=False)
\ No newline at end of file
+    """Open the config directory in file manager."""
+    subprocess.run(["xdg-open", str(WG_CONFIG_DIR)], check=False)
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""Background execution of blocking operations for wgtray."""
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from .logger import logger
+
+
+class TaskSignals(QObject):
+    """Signals delivered back on the thread that submitted the task."""
+    finished = Signal(object)
+    failed = Signal(str)
+
+
+class Task(QRunnable):
+    """Run a callable on a pool thread and report its result via signals."""
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            logger.exception(f"Background task {self.fn.__name__} failed")
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+
+class Worker:
+    """Thread pool that keeps subprocess and privileged work off the Qt main thread."""
+
+    def __init__(self, max_threads=4):
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self._tasks = set()
+
+    def submit(self, fn, *args, on_done=None, on_error=None, **kwargs):
+        """Run fn(*args, **kwargs) in the background.
+
+        Args:
+            on_done: Called with the return value on the main thread.
+            on_error: Called with the error message on the main thread.
+        """
+        task = Task(fn, *args, **kwargs)
+        if on_done:
+            task.signals.finished.connect(on_done)
+        if on_error:
+            task.signals.failed.connect(on_error)
+        # Keep the task alive until its signals have been delivered
+        self._tasks.add(task)
+        task.signals.finished.connect(lambda _: self._tasks.discard(task))
+        task.signals.failed.connect(lambda _: self._tasks.discard(task))
+        self.pool.start(task)
+        return task
+
+    def wait(self, msecs=-1):
+        """Wait for running tasks to finish."""
+        return self.pool.waitForDone(msecs)